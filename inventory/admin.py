@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, InventoryItem, RequestItem, Notification
+from .models import CustomUser, InventoryItem, RequestItem, Notification, NotificationArchive, StockMovement, StockSnapshot
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 
 @admin.register(CustomUser)
@@ -45,3 +45,22 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'message', 'is_read', 'created_at']
     list_filter = ['is_read']
     search_fields = ['user__username', 'message']
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['user', 'message', 'is_read', 'created_at']
+    list_filter = ['is_read']
+    raw_id_fields = ['user']
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['item', 'delta', 'reason', 'request', 'created_at']
+    list_filter = ['reason']
+    search_fields = ['item__name']
+    raw_id_fields = ['item', 'request']
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['item', 'quantity', 'taken_at']
+    search_fields = ['item__name']
+    raw_id_fields = ['item']
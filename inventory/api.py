@@ -0,0 +1,384 @@
+# inventory/api.py
+"""
+JSON API over inventory items, requests and notifications.
+
+    GET   /api/items/          ?fields= &limit= &cursor= &search= &start_date= &end_date= &category= &location= &low_stock=
+    POST  /api/items/          [{"name": ..., "quantity": ..., "reorder_level": ..., "category": ..., "location": ...}, ...]
+    PATCH /api/items/          [{"id": ..., <changed fields>}, ...]
+    GET   /api/requests/       ?fields= &limit= &cursor= &status= &item= &requester=
+    POST  /api/requests/       [{"item": ..., "quantity": ...}, ...]
+    PATCH /api/requests/       [{"id": ..., "status": "approved" | "rejected"}, ...]
+    GET   /api/notifications/  ?fields= &limit= &cursor= &is_read=
+    PATCH /api/notifications/  [{"id": ..., "is_read": true | false}, ...]
+    GET   /api/notifications/feed/  ?since= &fields= &limit=
+
+Lists are newest first and cursor-paginated like the HTML pages. Rows are
+read with ``values_list()`` and zipped straight into dicts, so no model
+instance or form is built per row; ``fields=`` narrows the columns selected.
+
+The notification feed runs the other way: it returns what arrived after the
+``since`` cursor, oldest first, with the cursor to poll with next and the
+user's unread count. Without ``since`` it returns no rows, just a cursor to
+start following from.
+
+Writes take an array and go through the same bookkeeping as the HTML views
+(counters, stock ledger, cached tables, admin notifications). Item and
+request-creation batches are all-or-nothing: any invalid row rejects the
+batch with per-row errors. Request decisions go through
+``services.bulk_approve`` / ``bulk_reject`` and report an outcome per id.
+
+Authentication is the normal session login, and unsafe methods need the
+CSRF token like any form post.
+"""
+import json
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from . import counters, fanout, fragments, reorder, services, unread
+from .forms import InventoryReportSearchForm
+from .models import InventoryItem, Notification, RequestItem, StockMovement
+from .pagination import PAGE_SIZE, values_page
+from .routers import replica_reads
+
+# Most rows returned per page, and accepted per write
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, status, body):
+        super().__init__(body)
+        self.status = status
+        self.body = body
+
+
+def _error(message, status=400):
+    return ApiError(status, {'error': message})
+
+
+class Resource:
+    """How one model is listed and filtered. ``columns`` maps public field names to ORM lookups."""
+    model = None
+    columns = {}
+    default_fields = ()
+
+    def queryset(self, request):
+        return self.model.objects.all()
+
+    def filter(self, request, queryset):
+        return queryset
+
+    def fields(self, request):
+        requested = request.GET.get('fields')
+        if not requested:
+            return list(self.default_fields or self.columns)
+        fields = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in self.columns]
+        if unknown:
+            raise _error(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.columns)}.")
+        return fields
+
+    def list(self, request):
+        fields = self.fields(request)
+        try:
+            limit = min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            raise _error("limit must be a whole number.") from None
+        queryset = self.filter(request, self.queryset(request))
+        with replica_reads():
+            page = values_page(request, queryset, [self.columns[name] for name in fields], per_page=max(limit, 1))
+        return {'results': [dict(zip(fields, row)) for row in page], 'next': page.next_url}
+
+
+class ItemResource(Resource):
+    model = InventoryItem
+    columns = {
+        'id': 'id', 'name': 'name', 'quantity': 'quantity', 'reorder_level': 'reorder_level',
+        'category': 'category', 'location': 'location', 'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    writable = ('name', 'quantity', 'reorder_level', 'category', 'location')
+
+    def filter(self, request, queryset):
+        form = InventoryReportSearchForm(request.GET)
+        if not form.is_valid():
+            raise ApiError(400, {'errors': form.errors.get_json_data()})
+        queryset = form.filter_items(queryset)
+        for name in ('category', 'location'):
+            if request.GET.get(name):
+                queryset = queryset.filter(**{name: request.GET[name]})
+        if request.GET.get('low_stock') == 'true':
+            queryset = reorder.below_reorder_level(queryset)
+        return queryset
+
+
+class RequestResource(Resource):
+    model = RequestItem
+    columns = {
+        'id': 'id', 'item': 'item_id', 'item_name': 'item__name', 'requester': 'requester_id',
+        'requester_username': 'requester__username', 'quantity': 'quantity', 'status': 'status',
+        'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    default_fields = ('id', 'item', 'requester', 'quantity', 'status', 'created_at', 'updated_at')
+
+    def filter(self, request, queryset):
+        status = request.GET.get('status')
+        if status:
+            if status not in dict(RequestItem.STATUS_CHOICES):
+                raise _error(f"Unknown status {status!r}.")
+            queryset = queryset.filter(status=status)
+        for name in ('item', 'requester'):
+            value = request.GET.get(name)
+            if value:
+                if not value.isdigit():
+                    raise _error(f"{name} must be an id.")
+                queryset = queryset.filter(**{f'{name}_id': int(value)})
+        return queryset
+
+
+class NotificationResource(Resource):
+    model = Notification
+    columns = {'id': 'id', 'message': 'message', 'is_read': 'is_read', 'created_at': 'created_at'}
+
+    def queryset(self, request):
+        return Notification.objects.filter(user=request.user)
+
+    def filter(self, request, queryset):
+        is_read = request.GET.get('is_read')
+        if is_read is not None:
+            if is_read not in ('true', 'false'):
+                raise _error("is_read must be true or false.")
+            queryset = queryset.filter(is_read=is_read == 'true')
+        return queryset
+
+
+class NotificationFeed(NotificationResource):
+    def list(self, request):
+        fields = self.fields(request)
+        try:
+            limit = max(min(int(request.GET.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE), 1)
+        except ValueError:
+            raise _error("limit must be a whole number.") from None
+        since = request.GET.get('since')
+        if since is not None and not since.isdigit():
+            raise _error("since must be a cursor from an earlier response.")
+        queryset = self.queryset(request)
+        with replica_reads():
+            if since is None:
+                latest = queryset.order_by('-pk').values_list('pk', flat=True).first()
+                return {'results': [], 'cursor': str(latest or 0), 'more': False,
+                        'unread': unread.count(request.user.id)}
+            # Ids only grow, so the cursor is simply the last id seen.
+            rows = list(queryset.filter(pk__gt=int(since)).order_by('pk').values_list(
+                'pk', *(self.columns[name] for name in fields))[:limit + 1])
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'results': [dict(zip(fields, row[1:])) for row in rows],
+            'cursor': str(rows[-1][0]) if rows else since,
+            'more': more,
+            'unread': unread.count(request.user.id),
+        }
+
+
+def _batch(request):
+    """The request body as a list of objects."""
+    try:
+        rows = json.loads(request.body)
+    except ValueError:
+        raise _error("The body must be JSON.") from None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise _error("The body must be an array of objects.")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise _error(f"At most {MAX_BATCH_SIZE} rows per request.")
+    return rows
+
+
+def _ids(rows):
+    ids = [row.get('id') for row in rows]
+    bad = {str(n): {'id': ["An integer id is required."]} for n, pk in enumerate(ids) if type(pk) is not int}
+    if bad:
+        raise ApiError(400, {'errors': bad})
+    return ids
+
+
+def _without_id(row):
+    return {name: value for name, value in row.items() if name != 'id'}
+
+
+def _clean(model, row, allowed, required=()):
+    """Validate ``row`` against the model fields. Returns ``(values, errors)``."""
+    values, errors = {}, {}
+    for name in sorted(set(row) - set(allowed)):
+        errors[name] = ["Unknown or read-only field."]
+    for name in required:
+        if name not in row:
+            errors[name] = ["This field is required."]
+    for name in allowed:
+        if name in row:
+            try:
+                values[name] = model._meta.get_field(name).clean(row[name], None)
+            except ValidationError as e:
+                errors[name] = e.messages
+    return values, errors
+
+
+def _check(errors):
+    if errors:
+        raise ApiError(400, {'errors': errors})
+
+
+def _require_staff(request):
+    if not request.user.is_staff:
+        raise _error("Staff only.", status=403)
+
+
+def create_items(request):
+    _require_staff(request)
+    rows, errors = [], {}
+    for n, row in enumerate(_batch(request)):
+        values, row_errors = _clean(InventoryItem, row, ItemResource.writable, required=('name', 'quantity'))
+        if row_errors:
+            errors[str(n)] = row_errors
+        rows.append(values)
+    _check(errors)
+    with transaction.atomic():
+        # bulk_create() skips the signals that keep these up to date.
+        items = InventoryItem.objects.bulk_create(InventoryItem(**values) for values in rows)
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id=item.pk, delta=item.quantity, reason='initial') for item in items if item.quantity
+        )
+        counters.adjust(counters.TOTAL_ITEMS, len(items))
+        fragments.bump()
+        reorder.check(item.pk for item in items)
+    return 201, {'created': [item.pk for item in items]}
+
+
+def update_items(request):
+    _require_staff(request)
+    rows = _batch(request)
+    ids = _ids(rows)
+    with transaction.atomic():
+        items = InventoryItem.objects.select_for_update().in_bulk(ids)
+        errors, changed, deltas = {}, {'updated_at'}, defaultdict(int)
+        for n, (pk, row) in enumerate(zip(ids, rows)):
+            values, row_errors = _clean(InventoryItem, _without_id(row), ItemResource.writable)
+            if pk not in items:
+                row_errors['id'] = ["No such item."]
+            if row_errors:
+                errors[str(n)] = row_errors
+                continue
+            item = items[pk]
+            if 'quantity' in values:
+                deltas[pk] += values['quantity'] - item.quantity
+            for name, value in values.items():
+                setattr(item, name, value)
+            changed.update(values)
+        _check(errors)
+        now = timezone.now()
+        for item in items.values():
+            item.updated_at = now
+        InventoryItem.objects.bulk_update(items.values(), sorted(changed))
+        StockMovement.objects.bulk_create(
+            StockMovement(item_id=pk, delta=delta, reason='adjustment') for pk, delta in deltas.items() if delta
+        )
+        fragments.bump()
+        reorder.check(items)
+    return 200, {'updated': sorted(items)}
+
+
+def create_requests(request):
+    rows, errors = [], {}
+    for n, row in enumerate(_batch(request)):
+        row = dict(row)
+        item = row.pop('item', None)
+        values, row_errors = _clean(RequestItem, row, ('quantity',), required=('quantity',))
+        if type(item) is not int:
+            row_errors['item'] = ["An integer item id is required."]
+        if row_errors:
+            errors[str(n)] = row_errors
+        rows.append({**values, 'item': item})
+    _check(errors)
+    # Checked in one query rather than by ForeignKey.clean(), which asks per row.
+    items = InventoryItem.objects.in_bulk({values['item'] for values in rows})
+    _check({
+        str(n): {'item': ["No such item."]} for n, values in enumerate(rows) if values['item'] not in items
+    })
+    with transaction.atomic():
+        created = RequestItem.objects.bulk_create(
+            RequestItem(requester=request.user, item_id=values['item'], quantity=values['quantity']) for values in rows
+        )
+        counters.adjust(counters.TOTAL_REQUESTS, len(created))
+        counters.adjust(counters.PENDING_REQUESTS, len(created))
+        for req in created:
+            fanout.notify_admins(f"{request.user.username} requested {items[req.item_id].name}")
+    return 201, {'created': [req.pk for req in created]}
+
+
+def decide_requests(request):
+    _require_staff(request)
+    rows = _batch(request)
+    ids = _ids(rows)
+    by_status, errors = defaultdict(list), {}
+    for n, (pk, row) in enumerate(zip(ids, rows)):
+        status = row.get('status')
+        if status not in ('approved', 'rejected') or set(row) - {'id', 'status'}:
+            errors[str(n)] = {'status': ["Only a status of 'approved' or 'rejected' can be set."]}
+        by_status[status].append(pk)
+    _check(errors)
+    outcomes = {}
+    if by_status['approved']:
+        outcomes.update(services.bulk_approve(by_status['approved']))
+    if by_status['rejected']:
+        outcomes.update(services.bulk_reject(by_status['rejected']))
+    return 200, {'outcomes': outcomes}
+
+
+def mark_notifications(request):
+    rows = _batch(request)
+    ids = _ids(rows)
+    by_state, errors = defaultdict(list), {}
+    for n, (pk, row) in enumerate(zip(ids, rows)):
+        if type(row.get('is_read')) is not bool or set(row) - {'id', 'is_read'}:
+            errors[str(n)] = {'is_read': ["Only is_read (true or false) can be set."]}
+        by_state[row.get('is_read')].append(pk)
+    _check(errors)
+    updated = 0
+    with transaction.atomic():
+        for is_read, pks in by_state.items():
+            # Only rows that change, so the unread count can follow.
+            changed = Notification.objects.filter(
+                user=request.user, pk__in=pks, is_read=not is_read).update(is_read=is_read)
+            unread.adjust({request.user.id: -changed if is_read else changed})
+            updated += changed
+    return 200, {'updated': updated}
+
+
+def _endpoint(resource, **handlers):
+    """A view that lists ``resource`` on GET and dispatches writes to ``handlers`` by method."""
+    def view(request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': "Authentication required."}, status=401)
+        try:
+            if request.method == 'GET':
+                return JsonResponse(resource.list(request))
+            handler = handlers.get(request.method.lower())
+            if handler is None:
+                allowed = ', '.join(['GET', *(method.upper() for method in handlers)])
+                response = JsonResponse({'error': f"Method not allowed. Use {allowed}."}, status=405)
+                response['Allow'] = allowed
+                return response
+            status, body = handler(request)
+            return JsonResponse(body, status=status)
+        except ApiError as e:
+            return JsonResponse(e.body, status=e.status)
+    return view
+
+
+items = _endpoint(ItemResource(), post=create_items, patch=update_items)
+requests = _endpoint(RequestResource(), post=create_requests, patch=decide_requests)
+notifications = _endpoint(NotificationResource(), patch=mark_notifications)
+notification_feed = _endpoint(NotificationFeed())
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        from . import counters, fragments, metrics, reorder, unread
+        counters.connect_signals()
+        fragments.connect_signals()
+        metrics.connect_signals()
+        reorder.connect_signals()
+        unread.connect_signals()
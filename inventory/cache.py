@@ -0,0 +1,354 @@
+# inventory/cache.py
+"""
+Two-tier cache backend: a bounded in-process LRU in front of a SQLite file
+shared by every worker process on the host.
+
+Each write or delete is also appended to an invalidation log in the shared
+file. Every process replays that log at most once per ``SYNC_INTERVAL``
+seconds and drops the local copies of keys changed elsewhere, so a local
+entry is never more than ``SYNC_INTERVAL`` out of date.
+
+The shared file is bounded like Django's own backends: once it holds more
+than ``MAX_ENTRIES`` live entries, the ``1/CULL_FREQUENCY`` soonest to expire
+are dropped (so short-lived fragments go before week-long sessions). The
+count is checked every ``CULL_EVERY`` writes per process rather than on each.
+
+Integers are stored as plain SQLite integers rather than pickles, so that
+``incr`` can be a single ``UPDATE ... SET value = value + ?`` in the shared
+file: atomic across processes, whatever their local tiers hold.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'inventory.cache.TwoTierCache',
+            'LOCATION': BASE_DIR / 'cache.sqlite3',
+            'OPTIONS': {
+                'LOCAL_MAX_ENTRIES': 1000, 'SYNC_INTERVAL': 0.5,
+                'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 3,
+            },
+        }
+    }
+"""
+import itertools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .lru import LRUCache
+
+# Invalidation log entries older than this are pruned
+LOG_RETENTION = 3600
+
+# Writes per process between checks of the shared file's size
+CULL_EVERY = 50
+
+
+def _encode(value):
+    if type(value) is int and -2**63 <= value < 2**63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(stored):
+    return stored if type(stored) is int else pickle.loads(stored)
+
+
+class SQLiteFile:
+    """A SQLite file shared between processes: one connection per thread and process."""
+
+    schema = ()
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        conn = self._connection()
+        for statement in self.schema:
+            conn.execute(statement)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction; the lock is taken up front so it never has to upgrade."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _write(self, statements):
+        with self.transaction() as conn:
+            cursor = None
+            for sql, params in statements:
+                cursor = conn.execute(sql, params)
+            return cursor
+
+
+class SQLiteStore(SQLiteFile):
+    """The shared tier of TwoTierCache."""
+
+    schema = (
+        'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+        'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+        'CREATE TABLE IF NOT EXISTS invalidations '
+        '(id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, created REAL NOT NULL)',
+    )
+
+    def __init__(self, path, max_entries, cull_frequency):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.cull_frequency = cull_frequency
+        self._writes = itertools.count(1)
+
+    def get(self, key, now):
+        row = self._connection().execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row
+
+    def set(self, key, value, expires, now, only_if_missing=False):
+        if only_if_missing:
+            sql = ('INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+                   'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+                   'WHERE cache.expires IS NOT NULL AND cache.expires <= ?')
+            params = (key, value, expires, now)
+        else:
+            sql = 'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)'
+            params = (key, value, expires)
+        cursor = self._write([
+            ('INSERT INTO invalidations (key, created) VALUES (?, ?)', (key, now)),
+            (sql, params),
+        ])
+        stored = cursor.rowcount > 0
+        if next(self._writes) % CULL_EVERY == 0:
+            self.cull(now)
+        return stored
+
+    def cull(self, now):
+        """
+        Drop expired entries and, if more than ``max_entries`` remain, the
+        ``1/cull_frequency`` of them soonest to expire (all of them for a
+        frequency of 0, as in Django). Returns how many live entries went.
+        """
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,))
+            count = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            if count <= self.max_entries:
+                return 0
+            limit = count // self.cull_frequency if self.cull_frequency else count
+            culled = conn.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?) RETURNING key',
+                (limit,),
+            ).fetchall()
+            # Other processes may hold these locally, e.g. a count that
+            # incr() can no longer reach.
+            conn.executemany('INSERT INTO invalidations (key, created) VALUES (?, ?)', [(key, now) for key, in culled])
+        return len(culled)
+
+    def touch(self, key, expires, now):
+        cursor = self._write([
+            ('INSERT INTO invalidations (key, created) VALUES (?, ?)', (key, now)),
+            ('UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)', (expires, key, now)),
+        ])
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta, now):
+        """Add ``delta`` to the value at ``key``. Returns the new value, or ``None`` if there is none."""
+        live = 'key = ? AND (expires IS NULL OR expires > ?)'
+        with self.transaction() as conn:
+            row = conn.execute(
+                f"UPDATE cache SET value = value + ? WHERE {live} AND typeof(value) = 'integer' RETURNING value",
+                (delta, key, now),
+            ).fetchone()
+            if row is None:
+                # Missing, or not a plain integer (e.g. pickled before this
+                # format); the transaction still holds the write lock.
+                row = conn.execute(f'SELECT value FROM cache WHERE {live}', (key, now)).fetchone()
+                if row is None:
+                    return None
+                row = (_decode(row[0]) + delta,)
+                conn.execute('UPDATE cache SET value = ? WHERE key = ?', (_encode(row[0]), key))
+            conn.execute('INSERT INTO invalidations (key, created) VALUES (?, ?)', (key, now))
+        return row[0]
+
+    def delete(self, key, now):
+        cursor = self._write([
+            ('INSERT INTO invalidations (key, created) VALUES (?, ?)', (key, now)),
+            ('DELETE FROM cache WHERE key = ?', (key,)),
+        ])
+        return cursor.rowcount > 0
+
+    def clear(self, now):
+        # A NULL key in the log tells every process to drop its whole local tier.
+        self._write([
+            ('INSERT INTO invalidations (key, created) VALUES (NULL, ?)', (now,)),
+            ('DELETE FROM cache', ()),
+        ])
+
+    def invalidations_since(self, last_id):
+        return self._connection().execute(
+            'SELECT id, key FROM invalidations WHERE id > ? ORDER BY id', (last_id,)
+        ).fetchall()
+
+    def last_invalidation(self):
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM invalidations').fetchone()[0]
+
+    def prune(self, now):
+        self._write([
+            ('DELETE FROM invalidations WHERE created < ?', (now - LOG_RETENTION,)),
+            ('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (now,)),
+        ])
+
+
+class _Tier:
+    """The per-process local tier for one LOCATION, shared by every thread."""
+
+    def __init__(self, location, local_max_entries, sync_interval, max_entries, cull_frequency):
+        self.store = SQLiteStore(location, max_entries, cull_frequency)
+        self.local = LRUCache(maxsize=local_max_entries)
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._last_seen = self.store.last_invalidation()
+        self._next_sync = 0.0
+        self._next_prune = time.time() + LOG_RETENTION / 10
+
+    def sync(self):
+        """Drop local entries that another process changed since the last sync."""
+        now = time.time()
+        if now < self._next_sync or not self._lock.acquire(blocking=False):
+            return
+        try:
+            entries = self.store.invalidations_since(self._last_seen)
+            if entries and entries[0][0] != self._last_seen + 1:
+                # Part of the log was pruned before we saw it; start over.
+                self.local.clear()
+            for entry_id, key in entries:
+                if key is None:
+                    self.local.clear()
+                else:
+                    self.local.delete(key)
+                self._last_seen = entry_id
+            if now >= self._next_prune:
+                self.store.prune(now)
+                self._next_prune = now + LOG_RETENTION / 10
+            self._next_sync = now + self.sync_interval
+        finally:
+            self._lock.release()
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def _get_tier(location, *options):
+    key = (str(location), os.getpid())
+    with _tiers_lock:
+        if key not in _tiers:
+            _tiers[key] = _Tier(location, *options)
+        return _tiers[key]
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._tier = _get_tier(
+            location, options.get('LOCAL_MAX_ENTRIES', 1000), options.get('SYNC_INTERVAL', 0.5),
+            self._max_entries, self._cull_frequency,
+        )
+        self._store = self._tier.store
+        self._local = self._tier.local
+
+    def _load(self, key):
+        """Return the live ``(pickled value, expires)`` pair for ``key``, or ``None``."""
+        self._tier.sync()
+        now = time.time()
+        entry = self._local.get(key)
+        if entry is not None:
+            if entry[1] is None or entry[1] > now:
+                return entry
+            self._local.delete(key)
+        entry = self._store.get(key, now)
+        if entry is not None:
+            self._local.set(key, entry)
+        return entry
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        entry = self._load(key)
+        return default if entry is None else _decode(entry[0])
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._load(key) is not None
+
+    def _put(self, key, value, timeout, only_if_missing=False):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        if expires is not None and expires <= now:
+            self._store.delete(key, now)
+            self._local.delete(key)
+            return False
+        encoded = _encode(value)
+        stored = self._store.set(key, encoded, expires, now, only_if_missing)
+        if stored:
+            self._local.set(key, (encoded, expires))
+        else:
+            self._local.delete(key)
+        return stored
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._put(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._put(key, value, timeout, only_if_missing=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local.delete(key)
+        return self._store.touch(key, self.get_backend_timeout(timeout), time.time())
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._local.delete(key)
+        return self._store.delete(key, time.time())
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Done in the shared file alone: the local copy may be stale.
+        self._local.delete(key)
+        value = self._store.incr(key, delta, time.time())
+        if value is None:
+            raise ValueError(f"Key '{key}' not found.")
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr, thread_sensitive=True)(key, delta, version=version)
+
+    async def adecr(self, key, delta=1, version=None):
+        return await self.aincr(key, -delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self._store.clear(time.time())
@@ -0,0 +1,90 @@
+# inventory/conditional.py
+"""
+Conditional GET for pages that only change when the data behind them does.
+
+Django's ``condition`` decorator calls its validators synchronously, which
+rules out database lookups from async views; ``conditional`` takes a
+validator of the same kind as the view instead. Either way the validator
+should be one cheap lookup: a page that has not changed is answered with
+304 before any of the view's own queries or rendering run.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.messages import get_messages
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+
+
+def viewer_tag(user):
+    """The parts of the user that the page chrome depends on, for an ETag."""
+    return f'{user.pk}.{user.role}.{int(user.is_staff)}'
+
+
+def csrf_tag(request):
+    """
+    A digest of the CSRF secret, for the ETag of a page that renders
+    ``{% csrf_token %}``. ``login()`` rotates the secret; without this a 304
+    would keep showing the page with the old token, and its forms would fail.
+    """
+    get_token(request)  # makes sure there is a secret, so the first visit's tag holds
+    return hashlib.sha256(request.META['CSRF_COOKIE'].encode()).hexdigest()[:16]
+
+
+def _precondition(request, validated):
+    etag, last_modified = validated
+    etag = quote_etag(etag) if etag is not None else None
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp), etag, timestamp
+
+
+def _add_headers(request, response, etag, timestamp):
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if etag:
+        response.headers.setdefault('ETag', etag)
+    if timestamp:
+        response.headers.setdefault('Last-Modified', http_date(timestamp))
+    # Let the browser keep the page, but have it ask every time.
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def _skip(request):
+    # Flash messages are rendered into the page once; they must not be
+    # swallowed by a 304.
+    return request.method not in ('GET', 'HEAD') or len(get_messages(request)) > 0
+
+
+def conditional(validators):
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` for the view.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag, last_modified)``,
+    either of which may be ``None``; for an async view it must be a coroutine
+    function.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if _skip(request):
+                    return await view(request, *args, **kwargs)
+                response, etag, timestamp = _precondition(request, await validators(request, *args, **kwargs))
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                _add_headers(request, response, etag, timestamp)
+                return response
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if _skip(request):
+                    return view(request, *args, **kwargs)
+                response, etag, timestamp = _precondition(request, validators(request, *args, **kwargs))
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                _add_headers(request, response, etag, timestamp)
+                return response
+        return wrapper
+    return decorator
@@ -0,0 +1,115 @@
+# inventory/counters.py
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import DashboardCounter, InventoryItem, RequestItem
+
+TOTAL_ITEMS = 'total_items'
+TOTAL_REQUESTS = 'total_requests'
+PENDING_REQUESTS = 'pending_requests'
+TOTAL_USERS = 'total_users'
+NAMES = (TOTAL_ITEMS, TOTAL_REQUESTS, PENDING_REQUESTS, TOTAL_USERS)
+
+CACHE_KEY = 'dashboard_counters'
+
+
+def compute():
+    """Count every tracked value from the source tables (the slow path)."""
+    return {
+        TOTAL_ITEMS: InventoryItem.objects.count(),
+        TOTAL_REQUESTS: RequestItem.objects.count(),
+        PENDING_REQUESTS: RequestItem.objects.filter(status='pending').count(),
+        TOTAL_USERS: get_user_model().objects.count(),
+    }
+
+
+def get_counts():
+    """Return the dashboard counters from cache, falling back to the summary table."""
+    counts = cache.get(CACHE_KEY)
+    if counts is None:
+        counts = dict(DashboardCounter.objects.filter(name__in=NAMES).values_list('name', 'value'))
+        if set(counts) != set(NAMES):
+            counts = reconcile()
+        cache.set(CACHE_KEY, counts, None)
+    return counts
+
+
+async def aget_counts():
+    """Async version of ``get_counts``."""
+    counts = await cache.aget(CACHE_KEY)
+    if counts is None:
+        counts = {
+            name: value
+            async for name, value in DashboardCounter.objects.filter(name__in=NAMES).values_list('name', 'value')
+        }
+        if set(counts) != set(NAMES):
+            counts = await sync_to_async(reconcile)()
+        await cache.aset(CACHE_KEY, counts, None)
+    return counts
+
+
+def adjust(name, delta):
+    """Add ``delta`` to a counter within the caller's transaction."""
+    if delta:
+        DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+        transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def reconcile():
+    """Rewrite the summary table from real counts. Returns the corrected values."""
+    counts = compute()
+    with transaction.atomic():
+        for name, value in counts.items():
+            DashboardCounter.objects.update_or_create(name=name, defaults={'value': value})
+    cache.delete(CACHE_KEY)
+    return counts
+
+
+def _remember_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status') if instance.pk else None
+
+
+def _item_saved(sender, instance, created, **kwargs):
+    if created:
+        adjust(TOTAL_ITEMS, 1)
+
+
+def _item_deleted(sender, instance, **kwargs):
+    adjust(TOTAL_ITEMS, -1)
+
+
+def _request_saved(sender, instance, created, **kwargs):
+    was_pending = not created and instance._loaded_status == 'pending'
+    if created:
+        adjust(TOTAL_REQUESTS, 1)
+    adjust(PENDING_REQUESTS, (instance.status == 'pending') - was_pending)
+    instance._loaded_status = instance.status
+
+
+def _request_deleted(sender, instance, **kwargs):
+    adjust(TOTAL_REQUESTS, -1)
+    if instance.status == 'pending':
+        adjust(PENDING_REQUESTS, -1)
+
+
+def _user_saved(sender, instance, created, **kwargs):
+    if created:
+        adjust(TOTAL_USERS, 1)
+
+
+def _user_deleted(sender, instance, **kwargs):
+    adjust(TOTAL_USERS, -1)
+
+
+def connect_signals():
+    post_init.connect(_remember_status, sender=RequestItem)
+    post_save.connect(_item_saved, sender=InventoryItem)
+    post_delete.connect(_item_deleted, sender=InventoryItem)
+    post_save.connect(_request_saved, sender=RequestItem)
+    post_delete.connect(_request_deleted, sender=RequestItem)
+    post_save.connect(_user_saved, sender=get_user_model())
+    post_delete.connect(_user_deleted, sender=get_user_model())
@@ -0,0 +1,105 @@
+# inventory/exports.py
+import csv
+import importlib.util
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.timezone import localtime
+
+HEADER = ['Item Name', 'Category', 'Quantity', 'Location', 'Date Added']
+FIELDS = ['name', 'category', 'quantity', 'location', 'created_at']
+
+# Rows fetched per round trip by the server-side cursor
+CHUNK_SIZE = 2000
+
+# XLSX export needs openpyxl, which is optional; without it the report
+# page offers CSV only.
+XLSX_AVAILABLE = importlib.util.find_spec('openpyxl') is not None
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(items):
+    """Yield report rows without caching the queryset or building model instances."""
+    for name, category, quantity, location, created_at in items.values_list(*FIELDS).iterator(CHUNK_SIZE):
+        yield [name, category or '', quantity, location or '', localtime(created_at).strftime('%Y-%m-%d %H:%M')]
+
+
+async def _pull(chunks):
+    chunks = iter(chunks)
+    # Always the same thread: a queryset being iterated belongs to the
+    # connection of the thread that started it.
+    pull = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while (chunk := await pull(chunks, done)) is not done:
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def streaming_response(request, chunks, **kwargs):
+    """
+    A StreamingHttpResponse that streams under either server. Django's ASGI
+    handler reads a sync iterator to the end before sending anything (as
+    WSGI does an async one), so under ASGI the chunks are pulled one at a
+    time in a worker thread by an async generator.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = _pull(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+def csv_response(request, items, filename):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        # Sent in blocks of rows, not a chunk (and a thread hop) per line.
+        block = [writer.writerow(HEADER)]
+        for row in iter_rows(items):
+            block.append(writer.writerow(row))
+            if len(block) >= CHUNK_SIZE:
+                yield ''.join(block)
+                block = []
+        if block:
+            yield ''.join(block)
+
+    response = streaming_response(request, lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(items, filename):
+    """
+    The report as a workbook. Unlike CSV this is not streamed: an XLSX file
+    is a ZIP whose directory is only written at the end, so the workbook is
+    built in a temporary file and sent once complete.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        return HttpResponse('XLSX export requires openpyxl to be installed.', status=501)
+
+    # Write-only mode streams rows to disk, so memory stays flat.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Inventory')
+    sheet.append(HEADER)
+    for row in iter_rows(items):
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,142 @@
+# inventory/fanout.py
+import atexit
+import logging
+import queue
+import threading
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+
+from . import unread
+from .models import Notification
+from .utils import send_real_time_notifications
+
+logger = logging.getLogger(__name__)
+
+# How long the dispatcher waits to gather a burst into one batch (seconds)
+FLUSH_INTERVAL = 0.5
+
+# Kinds of admin notification, and the real-time push titles for one
+# message of the kind and for several
+REQUEST = 'request'
+LOW_STOCK = 'low_stock'
+TITLES = {
+    REQUEST: ("New item request", "{count} new item requests"),
+    LOW_STOCK: ("Low stock", "{count} items low on stock"),
+}
+
+
+class Dispatcher:
+    """
+    Fans admin notifications out off the request path.
+
+    Messages are queued and written in batches: one bulk insert covers every
+    (admin, message) pair in the batch, and each admin gets one grouped
+    real-time push per kind of message however many arrived in the burst.
+
+    Messages stay in the queue until the batch is written, and go back to it
+    if the write fails, so neither a database error nor ``shutdown`` loses
+    what the thread had not stored yet.
+    """
+
+    def __init__(self, interval=FLUSH_INTERVAL, background=True):
+        self.interval = interval
+        self.background = background
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def submit(self, message, kind=REQUEST):
+        self._queue.put((kind, message))
+        if self.background:
+            self._ensure_started()
+            self._wake.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._stopping.is_set():
+                return
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-fanout', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let the burst gather; wakes early (and leaves the rest to
+            # shutdown) if the process is exiting.
+            if self._stopping.wait(self.interval):
+                return
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Notification fan-out batch failed")
+                # flush() put the batch back; try again after the interval.
+                self._wake.set()
+
+    def shutdown(self, timeout=10):
+        """
+        Stop the thread, wait for the batch it is writing, and store what is
+        still queued. Runs at interpreter exit, when the channel layer can no
+        longer be reached, so those last messages are stored but not pushed.
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush(push=False)
+
+    def _drain(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self._queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def flush(self, push=True):
+        """Deliver everything queued so far. Returns the rows created."""
+        batch = self._drain()
+        if not batch:
+            return []
+        try:
+            # One transaction, so a retry never repeats part of the batch.
+            with transaction.atomic():
+                admins = list(get_user_model().objects.filter(is_staff=True).only('id'))
+                created = Notification.objects.bulk_create(
+                    Notification(user=admin, message=message) for admin in admins for _, message in batch
+                )
+                # bulk_create() skips the signal that counts unread notifications.
+                unread.adjust(Counter(notification.user_id for notification in created))
+        except Exception:
+            # Nothing was stored (e.g. "database is locked"): requeue the
+            # batch for the next flush rather than lose it.
+            for entry in batch:
+                self._queue.put(entry)
+            raise
+        if not push:
+            return created
+        by_kind = defaultdict(list)
+        for kind, message in batch:
+            by_kind[kind].append(message)
+        pushes = []
+        for kind, bodies in by_kind.items():
+            one, several = TITLES[kind]
+            title = one if len(bodies) == 1 else several.format(count=len(bodies))
+            pushes.extend((admin, title, "\n".join(bodies)) for admin in admins)
+        send_real_time_notifications(pushes)
+        return created
+
+
+dispatcher = Dispatcher()
+atexit.register(lambda: dispatcher.shutdown())
+
+
+def notify_admins(message, kind=REQUEST):
+    """Queue ``message`` (one of the ``TITLES`` kinds) for every admin once the current transaction commits."""
+    transaction.on_commit(lambda: dispatcher.submit(message, kind))
@@ -1,6 +1,10 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, UserChangeForm
+from django.utils.timezone import make_aware
 from .models import InventoryItem, RequestItem, CustomUser
+from .search import normalize_query, search_items
 
 
 # Common widgets dictionary for form controls
@@ -11,13 +15,33 @@ form_select = {'class': 'form-select'}
 class InventoryItemForm(forms.ModelForm):
     class Meta:
         model = InventoryItem
-        fields = ['name', 'quantity', 'category', 'location']
+        fields = ['name', 'quantity', 'reorder_level', 'category', 'location']
         widgets = {
             'name': forms.TextInput(attrs=form_control),
             'quantity': forms.NumberInput(attrs=form_control),
+            'reorder_level': forms.NumberInput(attrs=form_control),
             'category': forms.TextInput(attrs=form_control),
             'location': forms.TextInput(attrs=form_control),
         }
+        help_texts = {
+            'reorder_level': "Admins are alerted when stock drops below this.",
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['reorder_level'].required = False
+
+    def clean_reorder_level(self):
+        # Left empty, the item keeps its current level (the default for new items).
+        level = self.cleaned_data.get('reorder_level')
+        return self.instance.reorder_level if level is None else level
+
+
+class InventoryImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV with a header row: name, quantity, category, location.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
 
 
 class RequestItemForm(forms.ModelForm):
@@ -106,5 +130,33 @@ class InventoryReportSearchForm(forms.Form):
     )
     search = forms.CharField(
         required=False,
-        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Search item name'})
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Search name, category or location'})
     )
+
+    def filter_items(self, items):
+        """Apply the cleaned filters to an InventoryItem queryset."""
+        if not self.is_valid():
+            return items
+        search = self.cleaned_data.get('search')
+        start_date = self.cleaned_data.get('start_date')
+        end_date = self.cleaned_data.get('end_date')
+        if search:
+            items = search_items(items, search)
+        # Compare against day boundaries so the created_at index can be used.
+        if start_date:
+            items = items.filter(created_at__gte=make_aware(datetime.combine(start_date, time.min)))
+        if end_date:
+            items = items.filter(created_at__lt=make_aware(datetime.combine(end_date + timedelta(days=1), time.min)))
+        return items
+
+    def normalized_filters(self):
+        """The filters ``filter_items`` applies, in a canonical form for cache keys."""
+        if not self.is_valid():
+            return ('', None, None)
+        start_date = self.cleaned_data.get('start_date')
+        end_date = self.cleaned_data.get('end_date')
+        return (
+            normalize_query(self.cleaned_data.get('search') or ''),
+            start_date.isoformat() if start_date else None,
+            end_date.isoformat() if end_date else None,
+        )
@@ -0,0 +1,77 @@
+# inventory/fragments.py
+"""
+Cached renders of the inventory tables.
+
+Every cached fragment is keyed by the current inventory *generation*, which
+is replaced in the same transaction as any change to ``InventoryItem``. A
+write therefore retires all cached tables the moment it commits, in every
+worker, and stale fragments simply expire. Each bump draws a fresh random
+value rather than adding one, so a rolled-back or restored counter can never
+come back to a generation whose fragments are still cached. Writes that
+bypass model signals (queryset ``update()``, ``bulk_create()``, raw SQL) must
+call ``bump()`` themselves.
+
+The counter lives in the ``DashboardCounter`` table rather than the cache:
+the cache's local tier may lag other processes by ``SYNC_INTERVAL``, which
+would show an admin the old table right after their own edit.
+"""
+import hashlib
+import secrets
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .models import DashboardCounter, InventoryItem
+
+GENERATION = 'inventory_generation'
+
+# Seconds a fragment is kept; superseded generations just age out
+TIMEOUT = 3600
+
+
+def bump():
+    """Invalidate every cached inventory fragment, within the caller's transaction."""
+    value = secrets.randbits(62)
+    if not DashboardCounter.objects.filter(name=GENERATION).update(value=value):
+        DashboardCounter.objects.get_or_create(name=GENERATION, defaults={'value': value})
+
+
+def generation():
+    return DashboardCounter.objects.filter(name=GENERATION).values_list('value', flat=True).first() or 0
+
+
+async def ageneration():
+    """Async version of ``generation``."""
+    return await DashboardCounter.objects.filter(name=GENERATION).values_list('value', flat=True).afirst() or 0
+
+
+def make_key(name, generation, *vary_on):
+    digest = hashlib.sha256(repr(vary_on).encode()).hexdigest()[:32]
+    return f'fragment:{name}:{generation}:{digest}'
+
+
+def get_or_render(key, render):
+    """Return the cached value for ``key``, calling ``render()`` to fill it on a miss."""
+    value = cache.get(key)
+    if value is None:
+        value = render()
+        cache.set(key, value, TIMEOUT)
+    return value
+
+
+async def aget_or_render(key, render):
+    """Async version of ``get_or_render``; ``render`` is a coroutine function."""
+    value = await cache.aget(key)
+    if value is None:
+        value = await render()
+        await cache.aset(key, value, TIMEOUT)
+    return value
+
+
+def _item_changed(sender, **kwargs):
+    bump()
+
+
+def connect_signals():
+    post_save.connect(_item_changed, sender=InventoryItem)
+    post_delete.connect(_item_changed, sender=InventoryItem)
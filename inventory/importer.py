@@ -0,0 +1,179 @@
+# inventory/importer.py
+import csv
+import json
+import operator
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters, fragments, reorder
+from .models import InventoryItem, StockMovement
+from .search import get_backend
+
+BATCH_SIZE = 20000
+
+_MAX_LENGTH = 100
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    low_stock: int = 0  # items the import left below their reorder level
+    errors: list = field(default_factory=list)  # [(line number, message), ...]
+    incomplete: bool = False  # the file became unreadable part way; rows before that were imported
+
+
+def _clean_row(name, quantity, category, location):
+    """Validate one CSV row's raw values. Returns ``(key, values)`` or raises ValueError."""
+    name = name.strip()
+    if not name:
+        raise ValueError("name is required")
+    try:
+        quantity = int(quantity)
+    except ValueError:
+        raise ValueError("quantity must be a whole number") from None
+    if quantity < 0:
+        raise ValueError("quantity cannot be negative")
+    category = category.strip() or None
+    location = location.strip() or None
+    for label, value in (('name', name), ('category', category), ('location', location)):
+        if value and len(value) > _MAX_LENGTH:
+            raise ValueError(f"{label} is longer than {_MAX_LENGTH} characters")
+    return (name, location), {'quantity': quantity, 'category': category}
+
+
+def _upsert(batch, result):
+    """Write one batch of ``{(name, location): values}`` in a single transaction."""
+    # Plain executemany() rather than bulk_create()/bulk_update(): building and
+    # preparing a model instance per row costs several times more than the
+    # actual insert at this volume.
+    table = connection.ops.quote_name(InventoryItem._meta.db_table)
+    movements = connection.ops.quote_name(StockMovement._meta.db_table)
+    names = {name for name, _ in batch}
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The names go in as one JSON parameter: an ORM ``__in`` with this
+        # many values costs more to build than the query does to run.
+        existing = {}
+        cursor.execute(
+            f'SELECT id, name, location, quantity, category FROM {table} '
+            f'WHERE name IN (SELECT value FROM json_each(%s))',
+            [json.dumps(list(names))],
+        )
+        for pk, name, location, quantity, category in cursor.fetchall():
+            existing.setdefault((name, location), (pk, quantity, category))
+
+        to_create, to_restock, to_update, moved = [], [], [], []
+        for (name, location), values in batch.items():
+            quantity, category = values['quantity'], values['category']
+            current = existing.get((name, location))
+            if current is None:
+                to_create.append((name, quantity, category, location, now, now))
+                continue
+            pk, old_quantity, old_category = current
+            if old_quantity != quantity:
+                moved.append((pk, quantity - old_quantity, 'import', now))
+            if old_category != category:
+                to_update.append((quantity, category, now, pk))
+            elif old_quantity != quantity:
+                # Quantity-only changes leave the search index alone.
+                to_restock.append((quantity, now, pk))
+            else:
+                result.unchanged += 1
+
+        last_id = None
+        if to_create:
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+            last_id = cursor.fetchone()[0]
+            with get_backend().bulk_insert():
+                cursor.executemany(
+                    f'INSERT INTO {table} (name, quantity, category, location, created_at, updated_at) '
+                    f'VALUES (%s, %s, %s, %s, %s, %s)',
+                    to_create,
+                )
+            cursor.execute(
+                f'INSERT INTO {movements} (item_id, delta, reason, created_at) '
+                f'SELECT id, quantity, %s, %s FROM {table} WHERE id > %s AND quantity > 0',
+                ['import', now, last_id],
+            )
+        if moved:
+            cursor.executemany(
+                f'INSERT INTO {movements} (item_id, delta, reason, created_at) VALUES (%s, %s, %s, %s)',
+                moved,
+            )
+        if to_restock:
+            cursor.executemany(f'UPDATE {table} SET quantity = %s, updated_at = %s WHERE id = %s', to_restock)
+        if to_update:
+            cursor.executemany(f'UPDATE {table} SET quantity = %s, category = %s, updated_at = %s WHERE id = %s', to_update)
+        # The raw writes skip the post_save signal that normally keeps this.
+        counters.adjust(counters.TOTAL_ITEMS, len(to_create))
+        # Announced once for the whole import (see import_csv), not per item.
+        result.low_stock += len(reorder.check([row[-1] for row in to_restock + to_update], notify=False))
+        if last_id is not None:
+            # New rows cannot have been claimed by anyone else yet.
+            result.low_stock += reorder.below_reorder_level().filter(pk__gt=last_id).update(reorder_alerted=True)
+    result.created += len(to_create)
+    result.updated += len(to_restock) + len(to_update)
+
+
+def import_csv(lines, batch_size=BATCH_SIZE):
+    """
+    Upsert inventory items from CSV text, matching existing items on
+    (name, location).
+
+    The input is streamed and written in batches. Rows that fail validation
+    are reported in ``ImportResult.errors`` and never abort the rest of the
+    import. Within a batch, the last row for a given (name, location) wins.
+    A file that stops decoding or parsing ends the import at that point:
+    the rows read before it are still written and ``incomplete`` is set.
+    """
+    result = ImportResult()
+    # A plain reader: DictReader builds a dict per row, which shows at a
+    # million rows.
+    reader = csv.reader(lines)
+    batch = {}
+    try:
+        header = next(reader, [])
+        missing = {'name', 'quantity'} - set(header)
+        if missing:
+            result.errors.append((1, f"missing column(s): {', '.join(sorted(missing))}"))
+            return result
+        # Rows are padded with one blank cell past the header, which is what an
+        # absent optional column reads.
+        width = len(header) + 1
+        pick = operator.itemgetter(*(
+            header.index(name) if name in header else width - 1 for name in ('name', 'quantity', 'category', 'location')
+        ))
+
+        for row in reader:
+            if not row:
+                continue
+            row += [''] * (width - len(row))
+            try:
+                key, values = _clean_row(*pick(row))
+            except ValueError as exc:
+                result.errors.append((reader.line_num, str(exc)))
+                continue
+            batch[key] = values
+            if len(batch) >= batch_size:
+                _upsert(batch, result)
+                batch = {}
+    except UnicodeDecodeError as exc:
+        # Text is decoded ahead of the reader, so the bad byte may be a few
+        # lines further on.
+        result.errors.append((reader.line_num + 1, f"not UTF-8 text from here on ({exc.reason})"))
+        result.incomplete = True
+    except csv.Error as exc:
+        result.errors.append((reader.line_num, f"not valid CSV from here on ({exc})"))
+        result.incomplete = True
+    if batch:
+        _upsert(batch, result)
+    # Once for the whole import: the raw writes skip the signal that
+    # versions the cached inventory tables.
+    if result.created or result.updated:
+        fragments.bump()
+    reorder.notify_import(result.low_stock)
+    return result
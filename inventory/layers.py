@@ -0,0 +1,250 @@
+# inventory/layers.py
+"""
+Channel layer shared by every worker process on one host, with no broker:
+messages and group memberships live in a SQLite file.
+
+Each process polls the file for messages addressed to the channels it
+created, backing off while idle, so ``send_real_time_notification`` from any
+web worker reaches websockets held by any Daphne process.
+
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'inventory.layers.SQLiteChannelLayer',
+            'CONFIG': {'path': BASE_DIR / 'channels.sqlite3'},
+        }
+    }
+"""
+import asyncio
+import pickle
+import random
+import string
+import time
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.conf import settings
+
+from .cache import SQLiteFile
+
+# Most messages handed to this process per poll
+RECEIVE_BATCH = 500
+
+# How often expired messages and group memberships are removed (seconds)
+CLEANUP_INTERVAL = 30
+
+
+def _random_name(length=12):
+    return ''.join(random.choice(string.ascii_letters) for _ in range(length))
+
+
+class MessageStore(SQLiteFile):
+    # ``inbox`` is the part of the channel name up to and including the "!",
+    # so one indexed query fetches everything a process needs to deliver.
+    schema = (
+        'CREATE TABLE IF NOT EXISTS messages '
+        '(id INTEGER PRIMARY KEY, inbox TEXT NOT NULL, channel TEXT NOT NULL, body BLOB NOT NULL, expires REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS messages_inbox ON messages (inbox, id)',
+        'CREATE INDEX IF NOT EXISTS messages_channel ON messages (channel)',
+        'CREATE TABLE IF NOT EXISTS memberships '
+        '(group_name TEXT NOT NULL, channel TEXT NOT NULL, inbox TEXT NOT NULL, expires REAL NOT NULL, '
+        'PRIMARY KEY (group_name, channel))',
+    )
+
+    def send(self, inbox, channel, body, expires, capacity):
+        with self.transaction() as conn:
+            queued = conn.execute('SELECT COUNT(*) FROM messages WHERE channel = ?', (channel,)).fetchone()[0]
+            if queued >= capacity:
+                return False
+            conn.execute(
+                'INSERT INTO messages (inbox, channel, body, expires) VALUES (?, ?, ?, ?)',
+                (inbox, channel, body, expires),
+            )
+        return True
+
+    def group_send(self, sends, expires, now):
+        """Copy each ``(group, body)`` to every member channel, all in one transaction."""
+        with self.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO messages (inbox, channel, body, expires) '
+                'SELECT inbox, channel, ?, ? FROM memberships WHERE group_name = ? AND expires > ?',
+                [(body, expires, group, now) for group, body in sends],
+            )
+
+    def take(self, inboxes, now, limit=RECEIVE_BATCH):
+        """Remove and return up to ``limit`` live ``(channel, body)`` rows for ``inboxes``, oldest first."""
+        marks = ', '.join('?' * len(inboxes))
+        # Most polls find nothing: answer those with a plain read, and take
+        # the write lock (which the senders need too) only to claim rows.
+        pending = self._connection().execute(
+            f'SELECT 1 FROM messages WHERE inbox IN ({marks}) LIMIT 1', tuple(inboxes),
+        ).fetchone()
+        if pending is None:
+            return []
+        with self.transaction() as conn:
+            rows = conn.execute(
+                f'SELECT id, channel, body, expires FROM messages WHERE inbox IN ({marks}) ORDER BY id LIMIT ?',
+                (*inboxes, limit),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    f'DELETE FROM messages WHERE inbox IN ({marks}) AND id <= ?', (*inboxes, rows[-1][0]))
+        return [(channel, body) for _, channel, body, expires in rows if expires > now]
+
+    def add_member(self, group, channel, inbox, expires):
+        self._write([(
+            'INSERT OR REPLACE INTO memberships (group_name, channel, inbox, expires) VALUES (?, ?, ?, ?)',
+            (group, channel, inbox, expires),
+        )])
+
+    def discard_member(self, group, channel):
+        self._write([('DELETE FROM memberships WHERE group_name = ? AND channel = ?', (group, channel))])
+
+    def clean_expired(self, now):
+        # A channel whose messages expire unread has no reader left: drop it
+        # from its groups as well, as the in-memory layer does.
+        self._write([
+            ('DELETE FROM memberships WHERE expires <= ? OR channel IN '
+             '(SELECT channel FROM messages WHERE expires <= ?)', (now, now)),
+            ('DELETE FROM messages WHERE expires <= ?', (now,)),
+        ])
+
+    def flush(self):
+        self._write([('DELETE FROM messages', ()), ('DELETE FROM memberships', ())])
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path=None, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None,
+                 poll_interval=0.1, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.store = MessageStore(path or settings.BASE_DIR / 'channels.sqlite3')
+        self.client_prefix = _random_name()
+        self._inboxes = set()
+        self._loop = None
+        self._queues = {}
+        self._poller = None
+        self._next_cleanup = 0.0
+
+    async def _run(self, func, *args):
+        # SQLite calls can wait on the file lock; keep them off the event loop.
+        return await asyncio.to_thread(func, *args)
+
+    # Channel layer API
+
+    async def new_channel(self, prefix='specific.'):
+        self._bind_loop()
+        inbox = f'{prefix}.{self.client_prefix}!'
+        channel = inbox + _random_name()
+        self._inboxes.add(inbox)
+        # Register the queue now, so messages sent before the first receive()
+        # are kept rather than dropped as addressed to a closed channel.
+        self._queues[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return channel
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        body = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        sent = await self._run(
+            self.store.send, self.non_local_name(channel), channel, body,
+            time.time() + self.expiry, self.get_capacity(channel),
+        )
+        if not sent:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        if '!' not in channel:
+            # Shared channels are read straight from the file by whichever
+            # process asks first; no local queue is involved.
+            while True:
+                rows = await self._run(self.store.take, [channel], time.time(), 1)
+                if rows:
+                    return pickle.loads(rows[0][1])
+                await asyncio.sleep(self.poll_interval)
+
+        self._bind_loop()
+        self._inboxes.add(self.non_local_name(channel))
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        self._ensure_poller()
+        try:
+            return await queue.get()
+        except asyncio.CancelledError:
+            # The consumer is gone; later messages for it are discarded.
+            self._queues.pop(channel, None)
+            raise
+
+    def _bind_loop(self):
+        """Local queues belong to one event loop; start over if asked from another."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._queues, self._poller = loop, {}, None
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+
+    async def _poll(self):
+        """Deliver messages for this process's channels, polling faster while busy."""
+        delay = self.poll_interval
+        while self._queues:
+            now = time.time()
+            if now >= self._next_cleanup:
+                self._next_cleanup = now + CLEANUP_INTERVAL
+                await self._run(self.store.clean_expired, now)
+            rows = await self._run(self.store.take, sorted(self._inboxes), now)
+            for channel, body in rows:
+                queue = self._queues.get(channel)
+                if queue is None or queue.full():
+                    continue
+                queue.put_nowait(pickle.loads(body))
+            if len(rows) == RECEIVE_BATCH:
+                delay = 0
+            elif rows:
+                delay = self.poll_interval / 20
+            else:
+                delay = min(max(delay * 2, self.poll_interval / 20), self.poll_interval)
+            await asyncio.sleep(delay)
+
+    async def flush(self):
+        self._queues = {}
+        await self._run(self.store.flush)
+
+    async def close(self):
+        pass
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._run(
+            self.store.add_member, group, channel, self.non_local_name(channel), time.time() + self.group_expiry)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_channel_name(channel)
+        self.require_valid_group_name(group)
+        await self._run(self.store.discard_member, group, channel)
+
+    async def group_send(self, group, message):
+        await self.group_send_many([(group, message)])
+
+    async def group_send_many(self, sends):
+        """
+        Send each ``(group, message)`` pair in one transaction. Group sends are
+        best-effort, as in the other layers: members over capacity are not
+        checked and never raise ChannelFull.
+        """
+        batch = []
+        for group, message in sends:
+            assert isinstance(message, dict), 'message is not a dict'
+            self.require_valid_group_name(group)
+            batch.append((group, pickle.dumps(message, pickle.HIGHEST_PROTOCOL)))
+        if batch:
+            now = time.time()
+            await self._run(self.store.group_send, batch, now + self.expiry, now)
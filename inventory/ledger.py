@@ -0,0 +1,65 @@
+# inventory/ledger.py
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import InventoryItem, StockMovement, StockSnapshot
+
+SNAPSHOT_CHUNK_SIZE = 2000
+
+
+def record(item_id, delta, reason, request_id=None):
+    """Append one movement. Call inside the transaction that changed the stock."""
+    if delta:
+        StockMovement.objects.create(item_id=item_id, delta=delta, reason=reason, request_id=request_id)
+
+
+def _sum(movements):
+    return movements.aggregate(total=Sum('delta'))['total'] or 0
+
+
+def stock_at(item, when):
+    """
+    Quantity of ``item`` at ``when``: the nearest snapshot plus a replay of
+    the movements between it and ``when``.
+    """
+    movements = StockMovement.objects.filter(item=item)
+    before = StockSnapshot.objects.filter(item=item, taken_at__lte=when).order_by('-taken_at').first()
+    if before is not None:
+        return before.quantity + _sum(movements.filter(created_at__gt=before.taken_at, created_at__lte=when))
+    # No snapshot yet at ``when``: rewind from the first one after it instead.
+    after = StockSnapshot.objects.filter(item=item, taken_at__gt=when).order_by('taken_at').first()
+    if after is not None:
+        return after.quantity - _sum(movements.filter(created_at__gt=when, created_at__lte=after.taken_at))
+    return _sum(movements.filter(created_at__lte=when))
+
+
+def movements_between(item, start, end):
+    """Movements for ``item`` in ``[start, end)``, oldest first."""
+    return StockMovement.objects.filter(item=item, created_at__gte=start, created_at__lt=end).order_by('created_at', 'pk')
+
+
+def take_snapshots():
+    """
+    Snapshot every item whose stock moved since the previous run (or every
+    item on the first run). Returns the number of snapshots written.
+    """
+    with transaction.atomic():
+        last_run = StockSnapshot.objects.aggregate(last=Max('taken_at'))['last']
+        # Stamp the snapshot only after the transaction has started reading, so
+        # any movement it can see is older than the snapshot.
+        now = timezone.now()
+        items = InventoryItem.objects.all()
+        if last_run is not None:
+            moved = StockMovement.objects.filter(created_at__gt=last_run, created_at__lte=now).values('item_id')
+            items = items.filter(pk__in=moved)
+
+        written = 0
+        batch = []
+        for pk, quantity in items.values_list('pk', 'quantity').iterator(SNAPSHOT_CHUNK_SIZE):
+            batch.append(StockSnapshot(item_id=pk, quantity=quantity, taken_at=now))
+            if len(batch) == SNAPSHOT_CHUNK_SIZE:
+                written += len(StockSnapshot.objects.bulk_create(batch))
+                batch = []
+        written += len(StockSnapshot.objects.bulk_create(batch))
+    return written
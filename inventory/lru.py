@@ -0,0 +1,87 @@
+# inventory/lru.py
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """A small thread-safe, size-bounded least-recently-used mapping."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def prune_directory(path, max_files, suffix):
+    """
+    Delete the least recently used ``*suffix`` files in ``path`` so at most
+    ``max_files`` remain. Recency is the file's mtime, which the disk caches
+    refresh on every hit. Returns how many files were deleted.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.endswith(suffix):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+    entries.sort()
+    deleted = 0
+    for _, file_path in entries[:max(len(entries) - max_files, 0)]:
+        try:
+            os.remove(file_path)
+            deleted += 1
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+class DirectoryPruner:
+    """Calls ``prune`` once every ``every`` writes, so a disk cache's size is checked without listing it per write."""
+
+    def __init__(self, prune, every=100):
+        self.prune = prune
+        self.every = every
+        self._writes = itertools.count(1)
+
+    def wrote(self):
+        if next(self._writes) % self.every == 0:
+            try:
+                self.prune()
+            except OSError:
+                pass
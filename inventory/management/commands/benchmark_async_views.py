@@ -0,0 +1,201 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.test import Client, override_settings
+from django.urls import include, path
+
+from inventory import counters, exports, fragments, reorder, unread, views
+from inventory.conditional import conditional, csrf_tag, viewer_tag
+from inventory.forms import InventoryReportSearchForm
+from inventory.models import InventoryItem, Notification, RequestItem
+from inventory.pagination import KeysetPage, decode_cursor, keyset_paginate
+from inventory.routers import read_only
+
+VIEWS = {
+    'admin_dashboard': '/admin_dashboard/',
+    'user_dashboard': '/user_dashboard/',
+    'notifications': '/notifications/',
+    'manage_inventory': '/manage_inventory/',
+    'generate_reports': '/generate-report/',
+}
+
+
+# The baseline: the blocking views the async ones replaced, kept in step
+# with today's templates, caches and validators so that sync against async
+# is the only difference. Each runs its reads one after another on a worker
+# thread, where the async view gathers them.
+
+@login_required
+@read_only
+def admin_dashboard(request):
+    low_stock = list(reorder.below_reorder_level().order_by('name')[:reorder.DASHBOARD_LIMIT + 1])
+    context = {
+        **counters.get_counts(), 'unread_count': unread.count(request.user.id),
+        'low_stock_items': low_stock[:reorder.DASHBOARD_LIMIT],
+        'more_low_stock': len(low_stock) > reorder.DASHBOARD_LIMIT,
+    }
+    return render(request, 'admin_dashboard.html', context)
+
+
+@login_required
+@read_only
+def user_dashboard(request):
+    requests = RequestItem.objects.filter(requester=request.user).select_related('item').order_by('-created_at')
+    context = {'requests': list(requests), 'unread_count': unread.count(request.user.id)}
+    return render(request, 'user_dashboard.html', context)
+
+
+@login_required
+def notifications(request):
+    marked = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    unread.adjust({request.user.id: -marked})
+    page = keyset_paginate(request, Notification.objects.filter(user=request.user))
+    return render(request, 'notifications.html', {'notifications': page, 'page': page})
+
+
+def _inventory_validators(request, *args, **kwargs):
+    return f'{fragments.generation():x}-{viewer_tag(request.user)}-{csrf_tag(request)}', None
+
+
+@login_required
+@conditional(_inventory_validators)
+def manage_inventory(request):
+    position = decode_cursor(request.GET.get('cursor', ''))
+    key = fragments.make_key('inventory_table', fragments.generation(), position)
+
+    def render_rows():
+        items = keyset_paginate(request, InventoryItem.objects.all())
+        return render_to_string('inventory_rows.html', {'items': items}), items.next_cursor
+
+    rows, next_cursor = fragments.get_or_render(key, render_rows)
+    return render(request, 'manage_inventory.html', {'rows': rows, 'page': KeysetPage([], next_cursor, request)})
+
+
+@login_required
+@read_only
+@conditional(_inventory_validators)
+def generate_reports(request):
+    form = InventoryReportSearchForm(request.GET or None)
+    items = form.filter_items(InventoryItem.objects.all())
+    key = fragments.make_key('report_rows', fragments.generation(), form.normalized_filters())
+
+    def render_rows():
+        items_shown = list(items[:views.REPORT_LIMIT + 1])
+        rows = render_to_string('report_rows.html', {'items': items_shown[:views.REPORT_LIMIT]})
+        return rows, len(items_shown) > views.REPORT_LIMIT
+
+    rows, truncated = fragments.get_or_render(key, render_rows)
+    return render(request, 'generate_report.html', {
+        'form': form, 'rows': rows, 'truncated': truncated, 'report_limit': views.REPORT_LIMIT,
+        'xlsx_available': exports.XLSX_AVAILABLE,
+    })
+
+
+SYNC_VIEWS = {
+    'admin_dashboard': admin_dashboard,
+    'user_dashboard': user_dashboard,
+    'notifications': notifications,
+    'manage_inventory': manage_inventory,
+    'generate_reports': generate_reports,
+}
+
+# Used as ROOT_URLCONF while the benchmark runs: the app's URLs, plus the
+# blocking baseline of each async view under /sync/.
+urlpatterns = [
+    *(path(f'sync{url}', SYNC_VIEWS[name]) for name, url in VIEWS.items()),
+    path('', include('inventory.urls')),
+]
+
+
+async def _request(app, url, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    status = None
+    body_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Django listens for a disconnect while it works; only hang up once
+        # the response is complete.
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the async read views against the blocking "
+        "implementations they replaced, through the ASGI handler at a fixed concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per view and mode.")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--views', default=','.join(VIEWS))
+        parser.add_argument('--username', default=None, help="User to run as; defaults to the first staff user.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = (User.objects.get(username=options['username']) if options['username']
+                else User.objects.filter(is_staff=True).order_by('pk').first())
+        if user is None:
+            raise CommandError("No staff user found; run 'manage.py seed_data' first.")
+        client = Client()
+        client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+        names = [name.strip() for name in options['views'].split(',') if name.strip()]
+        self.stdout.write(f"{'view':<18}{'mode':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        with override_settings(ROOT_URLCONF=__name__):
+            app = ASGIHandler()
+            for name in names:
+                for mode, url in (('sync', f'/sync{VIEWS[name]}'), ('async', VIEWS[name])):
+                    rps, p50, p95, errors = asyncio.run(
+                        self.run(app, url, cookie, options['requests'], options['concurrency']))
+                    self.stdout.write(f"{name:<18}{mode:>6}{rps:>10.1f}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+
+    async def run(self, app, url, cookie, total, concurrency):
+        gate = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one():
+            nonlocal errors
+            async with gate:
+                start = time.perf_counter()
+                status = await _request(app, url, cookie)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+
+        # Untimed, so neither mode pays for filling the shared fragment cache.
+        await _request(app, url, cookie)
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        quantiles = statistics.quantiles(latencies, n=100)
+        return total / elapsed, quantiles[49] * 1000, quantiles[94] * 1000, errors
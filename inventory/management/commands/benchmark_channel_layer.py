@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.layers import SQLiteChannelLayer
+
+
+def _consume(path, consumers, messages, ready, done):
+    """Runs in a separate process, like a Daphne worker holding ``consumers`` sockets."""
+    django.setup()
+    layer = SQLiteChannelLayer(path=path, capacity=messages)
+
+    async def main():
+        names = [await layer.new_channel() for _ in range(consumers)]
+        for n, name in enumerate(names):
+            await layer.group_add(f'bench_{n}', name)
+        ready.set()
+
+        async def drain(name):
+            for _ in range(messages):
+                await layer.receive(name)
+        await asyncio.gather(*(drain(name) for name in names))
+
+    asyncio.run(main())
+    done.set()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQLite channel layer throughput: group messages per second "
+        "delivered to N consumers held by another process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumers', type=int, default=100)
+        parser.add_argument('--messages', type=int, default=100, help="Messages sent to each consumer.")
+        parser.add_argument('--batch', type=int, default=500,
+                            help="Group sends per transaction; 1 sends them one by one.")
+        parser.add_argument('--timeout', type=float, default=300)
+
+    def handle(self, *args, **options):
+        consumers, messages, batch = options['consumers'], options['messages'], options['batch']
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'channels.sqlite3')
+            context = multiprocessing.get_context('spawn')
+            ready, done = context.Event(), context.Event()
+            worker = context.Process(target=_consume, args=(path, consumers, messages, ready, done))
+            worker.start()
+            try:
+                if not ready.wait(60):
+                    raise CommandError("Consumer process did not start.")
+                layer = SQLiteChannelLayer(path=path, capacity=messages)
+                sends = [(f'bench_{n}', {'type': 'send_notification', 'message': {'seq': seq}})
+                         for seq in range(messages) for n in range(consumers)]
+
+                async def send_all():
+                    for start in range(0, len(sends), batch):
+                        await layer.group_send_many(sends[start:start + batch])
+
+                start = time.perf_counter()
+                asyncio.run(send_all())
+                sent = time.perf_counter() - start
+                if not done.wait(options['timeout']):
+                    raise CommandError("Consumers did not receive every message before the timeout.")
+                elapsed = time.perf_counter() - start
+            finally:
+                worker.join(5)
+                if worker.is_alive():
+                    worker.terminate()
+
+        total = len(sends)
+        self.stdout.write(f"{total} messages to {consumers} consumers, batch={batch}")
+        self.stdout.write(f"sent in {sent:.3f}s ({total / sent:.0f} msg/s)")
+        self.stdout.write(self.style.SUCCESS(f"delivered in {elapsed:.3f}s ({total / elapsed:.0f} msg/s)"))
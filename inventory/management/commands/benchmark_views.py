@@ -0,0 +1,157 @@
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from inventory.models import InventoryItem, RequestItem
+
+# name -> (who runs it, what it does). Each step gets a logged-in client and
+# returns the response.
+SCENARIOS = {
+    'login': ('anonymous', lambda client, data: client.post(
+        '/', {'username': data.username('user'), 'password': data.password})),
+    'admin_dashboard': ('admin', lambda client, data: client.get('/admin_dashboard/')),
+    'user_dashboard': ('user', lambda client, data: client.get('/user_dashboard/')),
+    'manage_inventory': ('admin', lambda client, data: client.get('/manage_inventory/')),
+    'manage_requests': ('admin', lambda client, data: client.get('/manage_requests/')),
+    'manage_users': ('admin', lambda client, data: client.get('/manage-users/')),
+    'approve_request': ('admin', lambda client, data: client.post(f'/requests/approve/{data.pending_request()}/')),
+    'generate_report': ('admin', lambda client, data: client.get(
+        '/generate-report/', {'search': random.choice(['drill', 'laptop', 'office', 'warehouse'])})),
+    'export_pdf': ('admin', lambda client, data: client.get(f'/item-report/pdf/{random.choice(data.items)}/')),
+}
+
+
+class BenchmarkData:
+    """Users and rows to drive the views with, taken from seeded data."""
+
+    def __init__(self, password):
+        User = get_user_model()
+        self.password = password
+        self.users = {
+            'admin': list(User.objects.filter(username__startswith='seed_admin_').values_list('username', flat=True)),
+            'user': list(User.objects.filter(username__startswith='seed_user_').values_list('username', flat=True)),
+        }
+        if not self.users['admin'] or not self.users['user']:
+            raise CommandError("No seeded users found; run 'manage.py seed_data' first.")
+        self.items = list(InventoryItem.objects.values_list('pk', flat=True)[:1000])
+        self._pending = list(RequestItem.objects.filter(status='pending').values_list('pk', flat=True))
+        self._lock = threading.Lock()
+
+    def username(self, role):
+        return random.choice(self.users[role])
+
+    def pending_request(self):
+        with self._lock:
+            if not self._pending:
+                raise CommandError("Ran out of pending requests to approve; seed more requests.")
+            return self._pending.pop()
+
+    def client(self, role):
+        client = Client(SERVER_NAME='localhost')
+        if role != 'anonymous':
+            client.login(username=self.username(role), password=self.password)
+        return client
+
+
+def _summarise(latencies, elapsed, errors):
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50': quantiles[49] * 1000,
+        'p95': quantiles[94] * 1000,
+        'p99': quantiles[98] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the real views through the Django test client at set "
+        "concurrency levels and report p50/p95/p99 latency and throughput. "
+        "Needs data from 'manage.py seed_data'; approvals modify it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+        parser.add_argument('--concurrency', default='1,4,16', help="Comma-separated worker counts.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario and level.")
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--save', metavar='FILE', help="Write the results as a baseline JSON file.")
+        parser.add_argument('--baseline', metavar='FILE', help="Compare against a saved baseline.")
+        parser.add_argument('--max-regression', type=float, default=None, metavar='PCT',
+                            help="Fail if any p95 is more than PCT percent slower than the baseline.")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        data = BenchmarkData(options['password'])
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        results = {}
+        regressions = []
+        self.stdout.write(f"{'scenario':<18}{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in names:
+            for level in levels:
+                result = self.run(name, level, options['requests'], data)
+                results.setdefault(name, {})[str(level)] = result
+                line = (f"{name:<18}{level:>8}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                        f"{result['p95']:>10.1f}{result['p99']:>10.1f}{result['errors']:>8}")
+                before = (baseline or {}).get(name, {}).get(str(level))
+                if before:
+                    change = (result['p95'] - before['p95']) / before['p95'] * 100
+                    line += f"  p95 {change:+.0f}% vs baseline"
+                    if options['max_regression'] is not None and change > options['max_regression']:
+                        regressions.append(f"{name} x{level}: p95 {change:+.0f}%")
+                self.stdout.write(line)
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Baseline written to {options['save']}")
+        if regressions:
+            raise CommandError("p95 regressed past the limit: " + '; '.join(regressions))
+
+    def run(self, name, workers, total, data):
+        role, step = SCENARIOS[name]
+        per_worker = [total // workers + (1 if n < total % workers else 0) for n in range(workers)]
+
+        def worker(count):
+            client = data.client(role)
+            latencies, errors = [], 0
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = step(client, data)
+                    latencies.append(time.perf_counter() - start)
+                    if response.status_code >= 400 or (name == 'login' and response.status_code != 302):
+                        errors += 1
+            finally:
+                if workers > 1:
+                    connections.close_all()
+            return latencies, errors
+
+        started = time.perf_counter()
+        if workers == 1:
+            outcomes = [worker(total)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(worker, per_worker))
+        elapsed = time.perf_counter() - started
+        latencies = [latency for result, _ in outcomes for latency in result]
+        return _summarise(latencies, elapsed, sum(errors for _, errors in outcomes))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from inventory import pdf
+from inventory.models import InventoryItem
+
+
+class Command(BaseCommand):
+    help = "Render item report PDFs for a category and/or location into a ZIP file, in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP file to write")
+        parser.add_argument('--category')
+        parser.add_argument('--location')
+
+    def handle(self, *args, **options):
+        items = InventoryItem.objects.order_by('pk')
+        if options['category']:
+            items = items.filter(category=options['category'])
+        if options['location']:
+            items = items.filter(location=options['location'])
+
+        with open(options['output'], 'wb') as output:
+            for chunk in pdf.iter_zip(pdf.iter_item_reports(items)):
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote reports for {items.count()} item(s) to {options['output']}"))
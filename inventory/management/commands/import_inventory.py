@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory import importer
+
+
+class Command(BaseCommand):
+    help = "Upsert inventory items from a CSV file (name, quantity, category, location), matched on name and location."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+            result = importer.import_csv(lines, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} created, {result.updated} updated, {len(result.errors)} error(s) in {elapsed:.1f}s"
+        ))
+        if result.low_stock:
+            self.stdout.write(f"{result.low_stock} item(s) left below their reorder level.")
@@ -0,0 +1,110 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+
+from inventory import counters, services
+from inventory.forms import InventoryReportSearchForm
+from inventory.models import InventoryItem, RequestItem
+from inventory.routers import replica_reads
+
+# What DATABASES looked like before persistent connections, WAL and IMMEDIATE
+# transactions: SQLite defaults, a new connection per request, no replica.
+BASELINE = {'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE;'}, 'CONN_MAX_AGE': 0}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed read/write load against the configured database: each worker "
+        "runs request-shaped units of work (approvals, dashboard and report "
+        "reads). Run once with --baseline and once without to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--baseline', action='store_true',
+                            help="Use SQLite defaults and one connection per request.")
+
+    def handle(self, *args, **options):
+        baseline = options['baseline']
+        if baseline:
+            for alias in connections:
+                connections.settings[alias].update(BASELINE)
+                connections[alias].close()
+                del connections[alias]
+
+        user, _ = get_user_model().objects.get_or_create(username='__loadtest_db__')
+        items = [InventoryItem.objects.create(name=f'__loadtest_db_{n}__', quantity=10 ** 6) for n in range(20)]
+        RequestItem.objects.bulk_create(
+            RequestItem(requester=user, item=items[n % len(items)], quantity=1) for n in range(20000)
+        )
+        pending = list(RequestItem.objects.filter(requester=user).values_list('pk', flat=True))
+        pending_lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def read():
+            counters.compute()
+            form = InventoryReportSearchForm({'search': 'loadtest'})
+            form.is_valid()
+            list(form.filter_items(InventoryItem.objects.all())[:50])
+
+        def write():
+            with pending_lock:
+                pk = pending.pop() if pending else None
+            if pk is None:
+                # Every seeded request is approved; keep the load up with reads.
+                return read()
+            services.approve_request(RequestItem.objects.get(pk=pk))
+
+        def worker(n):
+            latencies, errors, tick = [], 0, 0
+            while time.monotonic() < deadline:
+                tick += 1
+                is_write = (tick * options['write_ratio']) % 1 + options['write_ratio'] >= 1
+                # Mirror the request cycle: connections are checked (and,
+                # without CONN_MAX_AGE, closed) at both ends of a request.
+                close_old_connections()
+                start = time.perf_counter()
+                try:
+                    if is_write:
+                        write()
+                    elif baseline:
+                        read()
+                    else:
+                        with replica_reads():
+                            read()
+                except OperationalError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                close_old_connections()
+            connections.close_all()
+            return latencies, errors
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(worker, range(options['workers'])))
+            elapsed = time.perf_counter() - started
+        finally:
+            RequestItem.objects.filter(requester=user).delete()
+            InventoryItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+            user.delete()
+            counters.reconcile()
+
+        latencies = sorted(latency for result, _ in results for latency in result)
+        errors = sum(errors for _, errors in results)
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(f"profile={'baseline' if baseline else 'configured'} workers={options['workers']}")
+        self.stdout.write(
+            f"{len(latencies)} operations in {elapsed:.1f}s ({len(latencies) / elapsed:.0f} ops/s), "
+            f"{errors} 'database is locked' errors"
+        )
+        self.stdout.write(
+            f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms"
+        )
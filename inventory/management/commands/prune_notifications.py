@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from inventory import retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Move notifications past their retention period (settings.NOTIFICATION_RETENTION) "
+        "into the archive table, in batches. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-days', type=int, help="Override READ_DAYS.")
+        parser.add_argument('--unread-days', type=int, help="Override UNREAD_DAYS.")
+        parser.add_argument('--batch-size', type=int, help="Override BATCH_SIZE.")
+        parser.add_argument('--no-archive', action='store_true', help="Delete instead of archiving.")
+
+    def handle(self, *args, **options):
+        overrides = {
+            key.upper(): options[key]
+            for key in ('read_days', 'unread_days', 'batch_size') if options[key] is not None
+        }
+        if options['no_archive']:
+            overrides['ARCHIVE'] = False
+        result = retention.prune(**overrides)
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {result['read']} read and {result['unread']} unread notification(s); "
+            f"{result['expired']} archived notification(s) expired."
+        ))
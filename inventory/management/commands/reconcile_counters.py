@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory import counters
+from inventory.models import DashboardCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the admin dashboard counters from the source tables and fix any "
+        "drift (e.g. from bulk inserts that bypass signals). Safe to run from cron."
+    )
+
+    def handle(self, *args, **options):
+        stored = dict(DashboardCounter.objects.values_list('name', 'value'))
+        actual = counters.reconcile()
+        for name, value in actual.items():
+            drift = value - stored.get(name, 0)
+            line = f"{name}: {value}"
+            if drift:
+                line += f" (corrected by {drift:+d})"
+            self.stdout.write(line)
@@ -0,0 +1,166 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from inventory import counters, fragments, reorder, unread
+from inventory.models import InventoryItem, Notification, RequestItem, StockMovement
+
+CATEGORIES = [
+    'Office Supplies', 'Electronics', 'Cleaning', 'Furniture', 'Tools', 'Safety',
+    'Kitchen', 'Networking', 'Stationery', 'Lab Equipment', 'Medical', 'Vehicles',
+]
+LOCATIONS = [
+    'Main Warehouse', 'Store Room A', 'Store Room B', 'Head Office', 'Lab 1',
+    'Lab 2', 'Workshop', 'Branch Office', 'Archive',
+]
+ADJECTIVES = ['Heavy-duty', 'Compact', 'Wireless', 'Portable', 'Standard', 'Premium', 'Spare', 'Large', 'Small']
+NOUNS = [
+    'Stapler', 'Laptop', 'Mop', 'Chair', 'Drill', 'Helmet', 'Kettle', 'Router', 'Notebook', 'Microscope',
+    'First Aid Kit', 'Toner', 'Cable', 'Monitor', 'Ladder', 'Projector', 'Gloves', 'Desk', 'Scanner', 'Battery',
+]
+
+
+def _zipf_weights(n, s=1.1):
+    """A few values are very common and most are rare, as with real stock and users."""
+    return [1 / (rank + 1) ** s for rank in range(n)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users, items, requests and notifications with skewed, realistic "
+        "distributions, for load tests and benchmarks. Use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--items', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--notifications', type=int, default=50000)
+        parser.add_argument('--password', default='password', help="Password given to every seeded user.")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed, for repeatable data.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            admins = self.seed_users('seed_admin', options['admins'], options['password'], admin=True)
+            users = self.seed_users('seed_user', options['users'], options['password'], admin=False)
+            items = self.seed_items(options['items'])
+            requests = self.seed_requests(options['requests'], users or admins, items)
+            self.seed_notifications(options['notifications'], admins, users, requests)
+        # bulk_create skips the signals that keep the dashboard counters, the
+        # cached inventory tables and the unread counts.
+        counters.reconcile()
+        fragments.bump()
+        unread.forget(user.pk for user in admins + users)
+        # Seeded low stock is not news; only later dips should alert.
+        reorder.below_reorder_level().update(reorder_alerted=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(admins)} admins, {len(users)} users, {len(items)} items, "
+            f"{len(requests)} requests and {options['notifications']} notifications."
+        ))
+
+    def ago(self, mean_days, max_days):
+        """A time in the past, recent ones more likely."""
+        days = min(self.rng.expovariate(1 / mean_days), max_days)
+        return self.now - timedelta(days=days)
+
+    def bulk_create(self, model, objs):
+        created = []
+        for start in range(0, len(objs), self.batch_size):
+            created.extend(model.objects.bulk_create(objs[start:start + self.batch_size]))
+        return created
+
+    def seed_users(self, prefix, count, password, admin):
+        User = get_user_model()
+        first = User.objects.filter(username__startswith=f'{prefix}_').count()
+        # Hashing is deliberately slow; every seeded user shares one hash.
+        hashed = make_password(password)
+        return self.bulk_create(User, [
+            User(
+                username=f'{prefix}_{n:05d}', password=hashed, email=f'{prefix}_{n:05d}@example.com',
+                role='admin' if admin else 'user', is_staff=admin, date_joined=self.ago(200, 730),
+            )
+            for n in range(first, first + count)
+        ])
+
+    def seed_items(self, count):
+        rng = self.rng
+        category_weights = _zipf_weights(len(CATEGORIES))
+        location_weights = _zipf_weights(len(LOCATIONS))
+        items = []
+        for n in range(count):
+            # Roughly one item in twelve is out of stock; the rest are log-normal.
+            quantity = 0 if rng.random() < 0.08 else min(int(rng.lognormvariate(3, 1.2)) + 1, 5000)
+            items.append(InventoryItem(
+                name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}',
+                quantity=quantity,
+                category=rng.choices(CATEGORIES, category_weights)[0] if rng.random() > 0.05 else None,
+                location=rng.choices(LOCATIONS, location_weights)[0],
+                created_at=self.ago(240, 730),
+            ))
+        items = self.bulk_create(InventoryItem, items)
+        self.bulk_create(StockMovement, [
+            StockMovement(item=item, delta=item.quantity, reason='initial', created_at=item.created_at)
+            for item in items if item.quantity
+        ])
+        return items
+
+    def seed_requests(self, count, users, items):
+        if not users or not items:
+            return []
+        rng = self.rng
+        # A handful of popular items and busy requesters receive most requests.
+        item_weights = _zipf_weights(len(items))
+        user_weights = _zipf_weights(len(users), s=0.8)
+        requests = []
+        for item, requester in zip(rng.choices(items, item_weights, k=count),
+                                   rng.choices(users, user_weights, k=count)):
+            created_at = max(self.ago(45, 365), item.created_at)
+            if self.now - created_at < timedelta(days=3):
+                status = rng.choices(['pending', 'approved', 'rejected'], [70, 25, 5])[0]
+            else:
+                status = rng.choices(['pending', 'approved', 'rejected'], [5, 80, 15])[0]
+            requests.append(RequestItem(
+                requester=requester, item=item, status=status, created_at=created_at,
+                quantity=min(1 + int(rng.expovariate(0.5)), 20),
+            ))
+        return self.bulk_create(RequestItem, requests)
+
+    def seed_notifications(self, count, admins, users, requests):
+        if not admins and not users:
+            return
+        rng = self.rng
+        notifications, created_ats = [], []
+        for _ in range(count):
+            req = rng.choice(requests) if requests else None
+            if admins and (not users or rng.random() < 0.6):
+                user = rng.choice(admins)
+                message = f"{req.requester.username} requested {req.quantity} x {req.item.name}" if req else "New item request"
+            else:
+                user = rng.choice(users)
+                message = f"Your request for {req.item.name} was {req.status}." if req else "Welcome!"
+            created_at = self.ago(20, 180)
+            # Old notifications have almost all been read.
+            read_chance = 0.95 if self.now - created_at > timedelta(days=14) else 0.4
+            notifications.append(Notification(user=user, message=message, is_read=rng.random() < read_chance))
+            created_ats.append(connection.ops.adapt_datetimefield_value(created_at))
+
+        created = self.bulk_create(Notification, notifications)
+        # created_at is auto_now_add, which bulk_create always overwrites; a
+        # plain executemany() is much cheaper than bulk_update()'s CASE here.
+        table = connection.ops.quote_name(Notification._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {table} SET created_at = %s WHERE id = %s',
+                [(created_at, n.pk) for created_at, n in zip(created_ats, created)],
+            )
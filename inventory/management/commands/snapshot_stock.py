@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot the stock of every item that moved since the last run. Run it "
+        "periodically (e.g. nightly) to keep point-in-time replays short."
+    )
+
+    def handle(self, *args, **options):
+        written = ledger.take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} snapshot(s)."))
@@ -0,0 +1,229 @@
+# inventory/metrics.py
+"""
+Per-view performance metrics in Prometheus text format.
+
+``MetricsMiddleware`` times every request and, through the hooks below,
+how much of it went to SQL, template rendering, PDF and QR work (phases can
+overlap: a lazy queryset runs its SQL while a template renders). Results are
+kept per URL name in in-process histograms and served at ``/metrics``;
+with several workers, each one reports its own numbers, so scrape every
+worker or aggregate by instance.
+
+Requests slower than ``SLOW_REQUEST_THRESHOLD`` seconds (unset by default)
+are logged to ``inventory.slow_requests`` with the SQL they ran.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+slow_logger = logging.getLogger('inventory.slow_requests')
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Most statements kept per request for the slow-request log
+SLOW_LOG_MAX_QUERIES = 200
+
+SQL = 'sql'
+TEMPLATE = 'template'
+PDF = 'pdf'
+QR = 'qr'
+PHASES = (SQL, TEMPLATE, PDF, QR)
+
+
+class Histogram:
+    """A cumulative histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name, documentation, labelnames, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = []
+
+request_seconds = Histogram(
+    'inventory_request_duration_seconds', 'Time to produce a response, per view.', ('view', 'method'))
+phase_seconds = Histogram(
+    'inventory_request_phase_seconds', 'Time spent in SQL, templates, PDF and QR work, per view.', ('view', 'phase'))
+sql_queries = Histogram(
+    'inventory_request_sql_queries', 'SQL statements executed per request, per view.', ('view',), QUERY_BUCKETS)
+pdf_render_seconds = Histogram(
+    'inventory_pdf_render_seconds', 'Time from queueing a PDF job to its file being ready.', ())
+
+
+class _RequestStats:
+    def __init__(self, capture_sql):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.sql = [] if capture_sql else None
+
+
+_current = ContextVar('inventory_request_stats', default=None)
+
+
+@contextmanager
+def timed(phase):
+    """Charge the time spent inside the block to ``phase`` of the current request."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[phase] += time.perf_counter() - start
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.phases[SQL] += elapsed
+        stats.queries += 1
+        if stats.sql is not None and len(stats.sql) < SLOW_LOG_MAX_QUERIES:
+            stats.sql.append((elapsed, sql))
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def _install_sql_wrapper(sender, connection, **kwargs):
+    # Installed for the life of each connection rather than per request: the
+    # async ORM runs queries on another thread, with its own connections.
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def connect_signals():
+    connection_created.connect(_install_sql_wrapper)
+    for connection in connections.all(initialized_only=True):
+        _install_sql_wrapper(None, connection)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token, start = self._begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._end(request, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self._begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._end(request, stats, start)
+        return response
+
+    def _begin(self):
+        stats = _RequestStats(capture_sql=getattr(settings, 'SLOW_REQUEST_THRESHOLD', None) is not None)
+        return stats, _current.set(stats), time.perf_counter()
+
+    def _end(self, request, stats, start):
+        elapsed = time.perf_counter() - start
+        view = _view_name(request)
+        request_seconds.observe(elapsed, view=view, method=request.method)
+        sql_queries.observe(stats.queries, view=view)
+        for phase, seconds in stats.phases.items():
+            phase_seconds.observe(seconds, view=view, phase=phase)
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD', None)
+        if threshold is not None and elapsed >= threshold:
+            slow_logger.warning(
+                "Slow request %s %s (%s): %.3fs, %d queries in %.3fs\n%s",
+                request.method, request.path, view, elapsed, stats.queries, stats.phases[SQL],
+                '\n'.join(f'{seconds * 1000:8.1f}ms  {sql}' for seconds, sql in stats.sql),
+            )
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed(TEMPLATE):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The stock Django engine, with rendering time charged to the current request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def render():
+    return '\n'.join(line for histogram in REGISTRY for line in histogram.render()) + '\n'
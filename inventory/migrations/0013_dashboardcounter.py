@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    DashboardCounter = apps.get_model('inventory', 'DashboardCounter')
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    RequestItem = apps.get_model('inventory', 'RequestItem')
+    CustomUser = apps.get_model('inventory', 'CustomUser')
+    DashboardCounter.objects.bulk_create([
+        DashboardCounter(name='total_items', value=InventoryItem.objects.count()),
+        DashboardCounter(name='total_requests', value=RequestItem.objects.count()),
+        DashboardCounter(name='pending_requests', value=RequestItem.objects.filter(status='pending').count()),
+        DashboardCounter(name='total_users', value=CustomUser.objects.count()),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_remove_inventoryitem_description_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='quantity',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('inventory', '0013_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['-created_at', '-id'], name='item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestitem',
+            index=models.Index(fields=['-created_at', '-id'], name='request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestitem',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='request_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestitem',
+            index=models.Index(fields=['requester', '-created_at'], name='request_requester_idx'),
+        ),
+    ]
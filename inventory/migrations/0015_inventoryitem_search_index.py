@@ -0,0 +1,61 @@
+from django.db import migrations
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE inventory_item_fts USING fts5(
+        name, category, location,
+        content='inventory_inventoryitem', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER inventory_item_fts_au AFTER UPDATE OF name, category, location ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    "INSERT INTO inventory_item_fts(inventory_item_fts) VALUES ('rebuild')",
+]
+
+BACKWARD_SQL = [
+    "DROP TRIGGER IF EXISTS inventory_item_fts_au",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ad",
+    "DROP TRIGGER IF EXISTS inventory_item_fts_ai",
+    "DROP TABLE IF EXISTS inventory_item_fts",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        # The FTS5 index only exists on SQLite; other databases use the
+        # fallback search backend.
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD_SQL), run(BACKWARD_SQL)),
+    ]
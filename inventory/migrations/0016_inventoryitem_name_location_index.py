@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_inventoryitem_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['name', 'location'], name='item_name_location_idx'),
+        ),
+    ]
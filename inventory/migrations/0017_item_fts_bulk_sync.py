@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Let bulk writers pause the per-row insert trigger and index a whole batch
+# with one INSERT ... SELECT, and stop re-indexing rows whose searchable
+# columns did not actually change.
+FORWARD_SQL = [
+    "CREATE TABLE inventory_item_fts_state (paused INTEGER NOT NULL)",
+    "INSERT INTO inventory_item_fts_state (paused) VALUES (0)",
+    "DROP TRIGGER inventory_item_fts_ai",
+    """
+    CREATE TRIGGER inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem
+    WHEN (SELECT paused FROM inventory_item_fts_state) = 0 BEGIN
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    "DROP TRIGGER inventory_item_fts_au",
+    """
+    CREATE TRIGGER inventory_item_fts_au AFTER UPDATE OF name, category, location ON inventory_inventoryitem
+    WHEN old.name IS NOT new.name OR old.category IS NOT new.category OR old.location IS NOT new.location BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+]
+
+BACKWARD_SQL = [
+    "DROP TRIGGER inventory_item_fts_ai",
+    """
+    CREATE TRIGGER inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    "DROP TRIGGER inventory_item_fts_au",
+    """
+    CREATE TRIGGER inventory_item_fts_au AFTER UPDATE OF name, category, location ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    "DROP TABLE inventory_item_fts_state",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_inventoryitem_name_location_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD_SQL), run(BACKWARD_SQL)),
+    ]
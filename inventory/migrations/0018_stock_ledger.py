@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def baseline_snapshots(apps, schema_editor):
+    # History before the ledger existed is unknown; start it from today's stock.
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    now = django.utils.timezone.now()
+    StockSnapshot.objects.bulk_create(
+        (StockSnapshot(item_id=pk, quantity=quantity, taken_at=now)
+         for pk, quantity in InventoryItem.objects.values_list('pk', 'quantity').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_item_fts_bulk_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('initial', 'Initial stock'), ('request', 'Request approved'), ('adjustment', 'Manual adjustment'), ('import', 'Import')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.inventoryitem')),
+                ('request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.requestitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'created_at'], name='movement_item_created_idx'), models.Index(fields=['created_at'], name='movement_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'taken_at'], name='snapshot_item_taken_idx'), models.Index(fields=['taken_at'], name='snapshot_taken_idx')],
+            },
+        ),
+        migrations.RunPython(baseline_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+import secrets
+
+from django.db import migrations
+
+
+def seed_generation(apps, schema_editor):
+    DashboardCounter = apps.get_model('inventory', 'DashboardCounter')
+    DashboardCounter.objects.get_or_create(name='inventory_generation', defaults={'value': secrets.randbits(62)})
+
+
+def remove_generation(apps, schema_editor):
+    DashboardCounter = apps.get_model('inventory', 'DashboardCounter')
+    DashboardCounter.objects.filter(name='inventory_generation').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_generation, remove_generation),
+    ]
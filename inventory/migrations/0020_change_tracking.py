@@ -0,0 +1,61 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+# Adding a NOT NULL column makes SQLite copy the items table into a new one,
+# which drops the search index triggers (0015, 0017) with the old table.
+# Put them back afterwards, in either direction.
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ai AFTER INSERT ON inventory_inventoryitem
+    WHEN (SELECT paused FROM inventory_item_fts_state) = 0 BEGIN
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_ad AFTER DELETE ON inventory_inventoryitem BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inventory_item_fts_au AFTER UPDATE OF name, category, location ON inventory_inventoryitem
+    WHEN old.name IS NOT new.name OR old.category IS NOT new.category OR old.location IS NOT new.location BEGIN
+        INSERT INTO inventory_item_fts(inventory_item_fts, rowid, name, category, location)
+        VALUES ('delete', old.id, old.name, old.category, old.location);
+        INSERT INTO inventory_item_fts(rowid, name, category, location)
+        VALUES (new.id, new.name, new.category, new.location);
+    END
+    """,
+]
+
+
+def restore_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_inventory_generation'),
+    ]
+
+    operations = [
+        # Runs last when this migration is reversed.
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='requestitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
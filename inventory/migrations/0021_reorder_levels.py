@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:12
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# These columns rebuild the items table too; see 0020.
+restore_triggers = import_module('inventory.migrations.0020_change_tracking').restore_triggers
+
+
+def mark_already_low(apps, schema_editor):
+    # Items that are low today were never announced; count them as alerted
+    # rather than flooding admins the next time each one is touched.
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItem.objects.filter(quantity__lt=models.F('reorder_level')).update(reorder_alerted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0020_change_tracking'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_alerted',
+            field=models.BooleanField(db_default=False, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='reorder_level',
+            field=models.PositiveIntegerField(db_default=5, default=5),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('reorder_level'))), fields=['name'], name='item_low_stock_idx'),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+        migrations.RunPython(mark_already_low, migrations.RunPython.noop),
+    ]
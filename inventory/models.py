@@ -10,6 +10,11 @@ class CustomUser(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+        ]
+
     @property
     def is_admin(self):
         return self.role == 'admin'
@@ -21,6 +26,23 @@ class InventoryItem(models.Model):
     category = models.CharField(max_length=100, blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Stock is low below this; see inventory/reorder.py
+    reorder_level = models.PositiveIntegerField(default=5, db_default=5)
+    reorder_alerted = models.BooleanField(default=False, db_default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='item_created_idx'),
+            models.Index(fields=['name', 'location'], name='item_name_location_idx'),
+            # Only the low-stock rows, so listing them never scans the table
+            models.Index(fields=['name'], condition=models.Q(quantity__lt=models.F('reorder_level')),
+                         name='item_low_stock_idx'),
+        ]
+
+    @property
+    def is_low_stock(self):
+        return self.quantity < self.reorder_level
 
     def __str__(self):
         return self.name
@@ -38,6 +60,14 @@ class RequestItem(models.Model):
     quantity = models.PositiveIntegerField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='request_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='request_status_idx'),
+            models.Index(fields=['requester', '-created_at'], name='request_requester_idx'),
+        ]
 
     def __str__(self):
         return f"{self.requester.username} requested {self.quantity} of {self.item.name}"
@@ -49,6 +79,74 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            # Find notifications past their retention period (see retention.py).
+            # Partial, because a boolean filter is not compared as a column value.
+            models.Index(fields=['created_at'], condition=models.Q(is_read=True), name='notif_read_created_idx'),
+            models.Index(fields=['created_at'], condition=models.Q(is_read=False), name='notif_unread_created_idx'),
+        ]
+
     def _str_(self):
         return f"{self.user.username} - {'Read' if self.is_read else 'Unread'}"
-    
\ No newline at end of file
+
+
+class NotificationArchive(models.Model):
+    """Notifications moved out of the inbox by ``retention.prune``."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    message = models.TextField()
+    is_read = models.BooleanField()
+    # Copied from the notification, not the time it was archived
+    created_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.created_at:%Y-%m-%d}"
+
+
+class DashboardCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class StockMovement(models.Model):
+    REASON_CHOICES = [
+        ('initial', 'Initial stock'),
+        ('request', 'Request approved'),
+        ('adjustment', 'Manual adjustment'),
+        ('import', 'Import'),
+    ]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='movements')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    request = models.ForeignKey(RequestItem, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'created_at'], name='movement_item_created_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}: {self.delta:+d} ({self.reason})"
+
+
+class StockSnapshot(models.Model):
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots')
+    quantity = models.PositiveIntegerField()
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'taken_at'], name='snapshot_item_taken_idx'),
+            models.Index(fields=['taken_at'], name='snapshot_taken_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}: {self.quantity} at {self.taken_at}"
@@ -0,0 +1,104 @@
+# inventory/pagination.py
+import base64
+from datetime import datetime
+
+PAGE_SIZE = 50
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, iterable like a list."""
+
+    def __init__(self, object_list, next_cursor, request):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.is_first = not request.GET.get('cursor')
+        self._request = request
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _url_with_cursor(self, cursor):
+        params = self._request.GET.copy()
+        params.pop('cursor', None)
+        if cursor:
+            params['cursor'] = cursor
+        query = params.urlencode()
+        return f"{self._request.path}?{query}" if query else self._request.path
+
+    @property
+    def next_url(self):
+        return self._url_with_cursor(self.next_cursor) if self.has_next else None
+
+    @property
+    def first_url(self):
+        return self._url_with_cursor(None)
+
+
+def encode_cursor(value, pk):
+    raw = f"{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(datetime, pk)`` for a cursor, or ``None`` if it is malformed."""
+    try:
+        value, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _page_query(request, queryset, field, per_page):
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    position = decode_cursor(request.GET.get('cursor', ''))
+    if position:
+        value, pk = position
+        # Written as a range plus an exclusion (rather than an OR) so the
+        # database can seek straight into the (field, id) index.
+        queryset = queryset.filter(**{f'{field}__lte': value}).exclude(**{field: value, 'pk__gte': pk})
+    # One extra row tells us whether there is a next page.
+    return queryset[:per_page + 1]
+
+
+def _make_page(rows, request, field, per_page):
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return KeysetPage(rows, next_cursor, request)
+
+
+def keyset_paginate(request, queryset, field='created_at', per_page=PAGE_SIZE):
+    """
+    Return the page of ``queryset`` after ``?cursor=``, newest first.
+
+    Rows are ordered by ``(-field, -pk)`` and the cursor holds the last row's
+    values, so each page is a single indexed range query no matter how deep
+    the reader has paged.
+    """
+    rows = list(_page_query(request, queryset, field, per_page))
+    return _make_page(rows, request, field, per_page)
+
+
+async def akeyset_paginate(request, queryset, field='created_at', per_page=PAGE_SIZE):
+    """Async version of ``keyset_paginate``."""
+    rows = [row async for row in _page_query(request, queryset, field, per_page)]
+    return _make_page(rows, request, field, per_page)
+
+
+def values_page(request, queryset, columns, field='created_at', per_page=PAGE_SIZE):
+    """
+    Like ``keyset_paginate``, but read with ``values_list(*columns)`` and
+    return plain tuples: no model instance is built for any row.
+    """
+    rows = list(_page_query(request, queryset.values_list(field, 'pk', *columns), field, per_page))
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1][0], rows[-1][1])
+    return KeysetPage([row[2:] for row in rows], next_cursor, request)
@@ -0,0 +1,261 @@
+# inventory/pdf.py
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent import futures
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.text import slugify
+from xhtml2pdf import pisa
+
+from . import metrics
+from .lru import DirectoryPruner, prune_directory
+from .models import RequestItem
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+UNKNOWN = 'unknown'
+
+# A pending marker older than this is assumed to belong to a dead worker
+PENDING_TIMEOUT = 300
+
+# Rendered PDFs kept on disk unless settings.PDF_CACHE_MAX_FILES says otherwise;
+# the least recently requested go first
+MAX_FILES = 5000
+
+_JOB_ID = re.compile(r'^[0-9a-f]{64}$')
+
+_pool = None
+_pool_lock = threading.Lock()
+# Jobs this process has in flight; written from request threads and from
+# the pool's callback thread
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+def cache_dir():
+    path = Path(getattr(settings, 'PDF_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'pdf_cache'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def job_id_for(html):
+    """PDFs are keyed by their rendered HTML, so any change to the item or request is a new job."""
+    return hashlib.sha256(html.encode()).hexdigest()
+
+
+def is_valid_job_id(job_id):
+    return bool(_JOB_ID.match(job_id))
+
+
+def pdf_path(job_id):
+    return cache_dir() / f'{job_id}.pdf'
+
+
+def _marker(job_id, suffix):
+    return cache_dir() / f'{job_id}.{suffix}'
+
+
+def _render(html, path):
+    """Runs in a worker process: render ``html`` to ``path`` atomically."""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as dest:
+        status = pisa.CreatePDF(html, dest=dest)
+    if status.err:
+        os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    return True
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = futures.ProcessPoolExecutor(max_workers=getattr(settings, 'PDF_WORKERS', None))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _finished(job_id, future, submitted):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+    metrics.pdf_render_seconds.observe(time.perf_counter() - submitted)
+    _marker(job_id, 'pending').unlink(missing_ok=True)
+    try:
+        ok = future.result()
+    except Exception:
+        logger.exception("PDF job %s crashed", job_id)
+        ok = False
+    if not ok:
+        _marker(job_id, 'failed').touch()
+    else:
+        _pruner.wrote()
+
+
+def prune_cache():
+    """Trim the disk cache to its size cap, dropping the least recently requested PDFs. Returns how many went."""
+    return prune_directory(cache_dir(), getattr(settings, 'PDF_CACHE_MAX_FILES', MAX_FILES), '.pdf')
+
+
+_pruner = DirectoryPruner(prune_cache)
+
+
+def _touch(path):
+    """Mark a cached PDF as just used, for ``prune_cache``. Returns whether it exists."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _future(job_id):
+    with _futures_lock:
+        return _futures.get(job_id)
+
+
+def submit(html):
+    """Queue ``html`` for rendering unless it is cached or already in flight. Returns the job id."""
+    with metrics.timed(metrics.PDF):
+        job_id = job_id_for(html)
+        with _futures_lock:
+            # Checked and claimed under the lock, so two requests for the same
+            # new PDF render it once.
+            if job_id in _futures or _touch(pdf_path(job_id)):
+                return job_id
+            _marker(job_id, 'failed').unlink(missing_ok=True)
+            _marker(job_id, 'pending').touch()
+            submitted = time.perf_counter()
+            future = _get_pool().submit(_render, html, str(pdf_path(job_id)))
+            _futures[job_id] = future
+        # Outside the lock: a future that has already finished runs the
+        # callback, which takes the lock, right here.
+        future.add_done_callback(lambda f: _finished(job_id, f, submitted))
+        return job_id
+
+
+def status(job_id):
+    # The disk markers make status visible to every worker process, not only
+    # the one that submitted the job.
+    if pdf_path(job_id).exists():
+        return DONE
+    if _future(job_id) is not None:
+        return PENDING
+    pending = _marker(job_id, 'pending')
+    if pending.exists() and time.time() - pending.stat().st_mtime < PENDING_TIMEOUT:
+        return PENDING
+    if _marker(job_id, 'failed').exists():
+        return FAILED
+    return UNKNOWN
+
+
+def wait(job_id, timeout=None):
+    """Block until a job submitted by this process finishes. Used by tests and commands."""
+    future = _future(job_id)
+    if future is not None:
+        future.result(timeout)
+    return status(job_id)
+
+
+def item_report_html(item, request_obj):
+    return get_template('print_item_report.html').render({'item': item, 'request_obj': request_obj})
+
+
+def iter_item_reports(items, chunk_size=200):
+    """Yield ``(filename, html)`` for each item, fetching first requests per chunk rather than per item."""
+    chunk = []
+    for item in items.iterator(chunk_size):
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield from _chunk_reports(chunk)
+            chunk = []
+    yield from _chunk_reports(chunk)
+
+
+def _chunk_reports(items):
+    first_requests = {}
+    requests = RequestItem.objects.filter(item__in=items).select_related('requester').order_by('item_id', 'pk')
+    for req in requests:
+        first_requests.setdefault(req.item_id, req)
+    for item in items:
+        yield f'{item.pk}-{slugify(item.name) or "item"}.pdf', item_report_html(item, first_requests.get(item.pk))
+
+
+def render_many(pages, window=None):
+    """
+    Render ``(name, html)`` pages across the pool, yielding ``(name, job_id)``
+    as each one finishes.
+
+    At most ``window`` jobs are in flight at once, so memory stays bounded
+    however many pages are requested.
+    """
+    window = window or 2 * (getattr(settings, 'PDF_WORKERS', None) or os.cpu_count() or 1)
+    in_flight = {}
+
+    def settle(done):
+        for future in done:
+            yield from in_flight.pop(future)
+
+    for name, html in pages:
+        job_id = submit(html)
+        future = _future(job_id)
+        if future is None:
+            yield name, job_id
+            continue
+        in_flight.setdefault(future, []).append((name, job_id))
+        if len(in_flight) >= window:
+            done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+            yield from settle(done)
+    yield from settle(futures.as_completed(list(in_flight)))
+
+
+class _ZipStream:
+    """Write-only, unseekable sink; zipfile falls back to data descriptors for it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(pages, window=None):
+    """Yield the bytes of a ZIP archive holding a PDF per page, in completion order."""
+    sink = _ZipStream()
+    failed = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, job_id in render_many(pages, window):
+            if status(job_id) != DONE:
+                failed.append(name)
+                continue
+            try:
+                archive.write(pdf_path(job_id), arcname=name)
+            except FileNotFoundError:
+                # Pruned from the cache since it rendered; nothing was
+                # written to the archive for it.
+                failed.append(name)
+                continue
+            yield sink.take()
+        if failed:
+            archive.writestr('errors.txt', 'Could not include:\n' + '\n'.join(failed) + '\n')
+    yield sink.take()
@@ -0,0 +1,89 @@
+# inventory/qr.py
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import qrcode
+from django.conf import settings
+
+from . import metrics
+from .lru import DirectoryPruner, LRUCache, prune_directory
+
+_KEY = re.compile(r'^[0-9a-f]{64}$')
+
+# Recently used QR images, keyed by the hash of their payload
+_memory = LRUCache(maxsize=getattr(settings, 'QR_MEMORY_CACHE_SIZE', 512))
+
+# Images kept on disk unless settings.QR_CACHE_MAX_FILES says otherwise; the
+# least recently registered go first
+MAX_FILES = 20000
+
+
+def cache_dir():
+    path = Path(getattr(settings, 'QR_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'qr_cache'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def key_for(data):
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def is_valid_key(key):
+    return bool(_KEY.match(key))
+
+
+def render_png(data):
+    buffer = io.BytesIO()
+    with metrics.timed(metrics.QR):
+        qrcode.make(data).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def load(key):
+    """Return the cached PNG for ``key`` from memory or disk, or ``None``."""
+    png = _memory.get(key)
+    if png is None:
+        try:
+            png = (cache_dir() / f'{key}.png').read_bytes()
+        except FileNotFoundError:
+            return None
+        _memory.set(key, png)
+    return png
+
+
+def register(data):
+    """
+    Make sure a QR image for ``data`` is cached and return its key.
+
+    Images are content-addressed, so the same payload is only ever encoded
+    once and its URL never changes meaning.
+    """
+    key = key_for(data)
+    path = cache_dir() / f'{key}.png'
+    try:
+        # Every page that links the image refreshes it, so prune_cache only
+        # drops images nothing has shown for a while.
+        os.utime(path)
+    except FileNotFoundError:
+        png = _memory.get(key) or render_png(data)
+        # A temp file of its own, so threads writing the same new image
+        # cannot replace each other's.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out:
+            out.write(png)
+        os.replace(tmp, path)
+        _memory.set(key, png)
+        _pruner.wrote()
+    return key
+
+
+def prune_cache():
+    """Trim the disk cache to its size cap, dropping the least recently used images. Returns how many went."""
+    return prune_directory(cache_dir(), getattr(settings, 'QR_CACHE_MAX_FILES', MAX_FILES), '.png')
+
+
+_pruner = DirectoryPruner(prune_cache)
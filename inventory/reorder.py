@@ -0,0 +1,74 @@
+# inventory/reorder.py
+"""
+Reorder alerts.
+
+An item is low on stock while ``quantity < reorder_level``. That query is
+served by a partial index holding only the low rows, so listing them costs
+the size of the list, not of the inventory.
+
+``reorder_alerted`` records that the current dip has been announced. ``check``
+sets it when an item crosses below its level and clears it once stock is
+back up, so admins hear about each crossing once however many deductions
+follow. Call it in the transaction that changed the quantities; model saves
+do so through the signal below, and writes that bypass ``save()`` call it
+themselves.
+"""
+from django.db.models import F
+from django.db.models.signals import post_save
+
+from . import fanout
+from .models import InventoryItem
+
+# Items listed on the admin dashboard
+DASHBOARD_LIMIT = 10
+
+
+def below_reorder_level(queryset=None):
+    """Items under their reorder level. Matches the partial index condition exactly."""
+    queryset = InventoryItem.objects.all() if queryset is None else queryset
+    return queryset.filter(quantity__lt=F('reorder_level'))
+
+
+def check(item_ids, notify=True):
+    """
+    Alert admins about items in ``item_ids`` that have just dropped below their
+    reorder level, and return their ids. With ``notify=False`` the crossings
+    are only recorded, for callers that announce them in one summary instead.
+    """
+    item_ids = list(item_ids)
+    if not item_ids:
+        return []
+    crossed, restocked = [], []
+    rows = InventoryItem.objects.filter(pk__in=item_ids).values_list(
+        'pk', 'name', 'quantity', 'reorder_level', 'reorder_alerted')
+    for pk, name, quantity, reorder_level, alerted in rows:
+        # Claimed with a conditional UPDATE, so concurrent writers alert once between them.
+        if quantity < reorder_level and not alerted and (
+                InventoryItem.objects.filter(pk=pk, reorder_alerted=False).update(reorder_alerted=True)):
+            crossed.append(pk)
+            if notify:
+                fanout.notify_admins(
+                    f"Low stock: {name} is down to {quantity} (reorder level {reorder_level}).", fanout.LOW_STOCK)
+        elif quantity >= reorder_level and alerted:
+            # Back in stock: the next dip alerts again.
+            restocked.append(pk)
+    if restocked:
+        InventoryItem.objects.filter(pk__in=restocked).update(reorder_alerted=False)
+    return crossed
+
+
+def notify_import(count):
+    """One alert for the ``count`` items an import left below their reorder level."""
+    if count:
+        fanout.notify_admins(
+            f"Low stock: the import left {count} item(s) below their reorder level.", fanout.LOW_STOCK)
+
+
+def _item_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'quantity', 'reorder_level'} & set(update_fields):
+        return
+    check([instance.pk])
+
+
+def connect_signals():
+    post_save.connect(_item_saved, sender=InventoryItem)
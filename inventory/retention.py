@@ -0,0 +1,80 @@
+# inventory/retention.py
+"""
+Notification retention.
+
+Every admin gets a copy of every fan-out message, so the notifications
+table grows without bound. ``prune`` moves notifications that have outlived
+their policy into ``NotificationArchive`` (or just deletes them) in small
+batches, each in its own transaction, so the job never holds the SQLite
+write lock for long. Policies come from ``settings.NOTIFICATION_RETENTION``;
+see ``DEFAULTS`` for the keys.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import unread
+from .models import Notification, NotificationArchive
+
+DEFAULTS = {
+    'READ_DAYS': 30,        # read notifications older than this leave the inbox
+    'UNREAD_DAYS': 180,     # unread ones are kept longer; None keeps them forever
+    'ARCHIVE': True,        # copy to NotificationArchive before deleting
+    'ARCHIVE_DAYS': 365,    # archived rows older than this are dropped; None keeps them
+    'BATCH_SIZE': 1000,
+}
+
+
+def policies(**overrides):
+    """The retention settings, with ``overrides`` (e.g. from the command line) on top."""
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATION_RETENTION', {}), **overrides}
+
+
+def _move(stale, archive, batch_size):
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Oldest first, straight off the partial created_at index for the read state.
+            rows = list(stale.order_by('created_at', 'pk').values_list(
+                'pk', 'user_id', 'message', 'is_read', 'created_at')[:batch_size])
+            if archive:
+                NotificationArchive.objects.bulk_create(
+                    NotificationArchive(user_id=user_id, message=message, is_read=is_read, created_at=created_at)
+                    for _, user_id, message, is_read, created_at in rows
+                )
+            Notification.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            unread.adjust(Counter(user_id for _, user_id, _, is_read, _ in rows if not is_read))
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+
+
+def _expire(stale, batch_size):
+    expired = 0
+    while True:
+        pks = list(stale.order_by('created_at').values_list('pk', flat=True)[:batch_size])
+        expired += NotificationArchive.objects.filter(pk__in=pks).delete()[0]
+        if len(pks) < batch_size:
+            return expired
+
+
+def prune(now=None, **overrides):
+    """
+    Apply the retention policies. Returns how many notifications were moved
+    out for each read state, and how many archived rows expired.
+    """
+    policy = policies(**overrides)
+    now = now or timezone.now()
+    result = {'read': 0, 'unread': 0, 'expired': 0}
+    for key, is_read in (('read', True), ('unread', False)):
+        days = policy[f'{key.upper()}_DAYS']
+        if days is not None:
+            stale = Notification.objects.filter(is_read=is_read, created_at__lt=now - timedelta(days=days))
+            result[key] = _move(stale, policy['ARCHIVE'], policy['BATCH_SIZE'])
+    if policy['ARCHIVE_DAYS'] is not None:
+        stale = NotificationArchive.objects.filter(created_at__lt=now - timedelta(days=policy['ARCHIVE_DAYS']))
+        result['expired'] = _expire(stale, policy['BATCH_SIZE'])
+    return result
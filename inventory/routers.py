@@ -0,0 +1,75 @@
+# inventory/routers.py
+"""
+Read/write routing. Views wrapped in ``read_only`` send their reads to the
+``replica`` database when one is configured; every write, and every read
+outside those views, goes to ``default``.
+
+With SQLite the replica is the same file opened read-only: in WAL mode
+readers never block the writer, and a read-only connection cannot take the
+write lock by accident.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+_read_only = ContextVar('inventory_read_only', default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only(view):
+    """Serve the view's reads from the replica. Writes inside it still go to ``default``."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _mirrors_default():
+    # Under the test runner the replica is a TEST MIRROR: same database, but
+    # a second connection outside the test's transaction. Reading through
+    # ``default`` is equivalent there and sees the test's own writes.
+    return connections[REPLICA].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and REPLICA in settings.DATABASES and not _mirrors_default():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or saving an instance loaded from the replica would
+        # follow it there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
@@ -0,0 +1,92 @@
+# inventory/search.py
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+FTS_TABLE = 'inventory_item_fts'
+FTS_STATE_TABLE = 'inventory_item_fts_state'
+
+
+class ContainsBackend:
+    """Portable fallback: case-insensitive substring match on every field."""
+
+    def search(self, queryset, text):
+        terms = re.findall(r'\w+', text)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(category__icontains=term) | Q(location__icontains=term)
+            )
+        return queryset
+
+    @contextmanager
+    def bulk_insert(self):
+        yield
+
+
+class SQLiteFTSBackend:
+    """
+    Ranked prefix search over the FTS5 index on name, category and location.
+
+    The index is an external-content table kept in sync by triggers (see
+    migration 0015), so searching never touches the items table with LIKE.
+    """
+
+    def match_expression(self, text):
+        # Quote each term so user input cannot inject FTS operators.
+        return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', text))
+
+    def search(self, queryset, text):
+        expression = self.match_expression(text)
+        if not expression:
+            return queryset
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[expression],
+            select={'search_rank': f'{FTS_TABLE}.rank'},
+            order_by=['search_rank'],
+        )
+
+    @contextmanager
+    def bulk_insert(self):
+        """
+        Index rows inserted inside the block with one INSERT ... SELECT at the
+        end instead of one trigger call per row. Must run inside a transaction,
+        so other connections never see the trigger paused.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM inventory_inventoryitem')
+            last_id = cursor.fetchone()[0]
+            cursor.execute(f'UPDATE {FTS_STATE_TABLE} SET paused = 1')
+            try:
+                yield
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE}(rowid, name, category, location) '
+                    f'SELECT id, name, category, location FROM inventory_inventoryitem WHERE id > %s',
+                    [last_id],
+                )
+            finally:
+                cursor.execute(f'UPDATE {FTS_STATE_TABLE} SET paused = 0')
+
+
+def get_backend():
+    path = getattr(settings, 'INVENTORY_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return ContainsBackend()
+
+
+def normalize_query(text):
+    """The terms both backends match on, lowercased: equal for equivalent searches."""
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def search_items(queryset, text):
+    return get_backend().search(queryset, text)
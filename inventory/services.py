@@ -0,0 +1,172 @@
+# inventory/services.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+
+from . import counters, fragments, ledger, reorder
+from .models import InventoryItem, RequestItem, StockMovement
+
+# Per-request outcomes returned by the approval and rejection helpers
+APPROVED = 'approved'
+ALREADY_APPROVED = 'already_approved'
+INSUFFICIENT_STOCK = 'insufficient_stock'
+REJECTED = 'rejected'
+NOT_PENDING = 'not_pending'
+
+# Number of requests processed per transaction by the bulk actions
+BULK_CHUNK_SIZE = 500
+
+
+class _InsufficientStock(Exception):
+    """Raised inside the approval transaction to roll back the status change."""
+
+
+class _StockChanged(Exception):
+    """Raised when stock moved between reading and deducting a bulk chunk."""
+
+
+def approve_request(req):
+    """
+    Approve ``req`` and deduct its quantity from stock in one transaction.
+
+    The stock check and the decrement are a single conditional UPDATE, so two
+    concurrent approvals can never both pass the check and oversell the item.
+    The status change is claimed the same way, so a request is only ever
+    deducted once.
+    """
+    # Queryset updates skip auto_now, so every one sets updated_at itself.
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            claimed = (
+                RequestItem.objects
+                .filter(pk=req.pk, status='pending')
+                .update(status='approved', updated_at=now)
+            )
+            counters.adjust(counters.PENDING_REQUESTS, -claimed)
+            if not claimed:
+                claimed = (
+                    RequestItem.objects
+                    .filter(pk=req.pk, status='rejected')
+                    .update(status='approved', updated_at=now)
+                )
+            if not claimed:
+                return ALREADY_APPROVED
+            deducted = (
+                InventoryItem.objects
+                .filter(pk=req.item_id, quantity__gte=req.quantity)
+                .update(quantity=F('quantity') - req.quantity, updated_at=now)
+            )
+            if not deducted:
+                raise _InsufficientStock
+            fragments.bump()
+            reorder.check([req.item_id])
+            ledger.record(req.item_id, -req.quantity, 'request', request_id=req.pk)
+    except _InsufficientStock:
+        return INSUFFICIENT_STOCK
+    req.status = 'approved'
+    return APPROVED
+
+
+def _chunks(ids, size):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _approve_chunk(ids):
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            RequestItem.objects
+            .select_for_update()
+            .filter(pk__in=ids, status='pending')
+            .order_by('created_at', 'pk')
+            .values_list('pk', 'item_id', 'quantity')
+        )
+        stock = dict(
+            InventoryItem.objects
+            .select_for_update()
+            .filter(pk__in={item_id for _, item_id, _ in pending})
+            .values_list('pk', 'quantity')
+        )
+
+        # Oldest requests are served first; anything that no longer fits is skipped.
+        totals = defaultdict(int)
+        outcomes = {pk: NOT_PENDING for pk in ids}
+        for pk, item_id, quantity in pending:
+            if stock[item_id] - totals[item_id] >= quantity:
+                totals[item_id] += quantity
+                outcomes[pk] = APPROVED
+            else:
+                outcomes[pk] = INSUFFICIENT_STOCK
+
+        if totals:
+            guard = Q()
+            for item_id, total in totals.items():
+                guard |= Q(pk=item_id, quantity__gte=total)
+            deducted = InventoryItem.objects.filter(guard).update(
+                quantity=Case(
+                    *(When(pk=item_id, then=F('quantity') - total) for item_id, total in totals.items()),
+                    default=F('quantity'),
+                    output_field=PositiveIntegerField(),
+                ),
+                updated_at=now,
+            )
+            approved = [pk for pk, outcome in outcomes.items() if outcome == APPROVED]
+            claimed = (
+                RequestItem.objects
+                .filter(pk__in=approved, status='pending')
+                .update(status='approved', updated_at=now)
+            )
+            if deducted != len(totals) or claimed != len(approved):
+                raise _StockChanged
+            StockMovement.objects.bulk_create(
+                StockMovement(item_id=item_id, delta=-quantity, reason='request', request_id=pk)
+                for pk, item_id, quantity in pending if outcomes[pk] == APPROVED
+            )
+            counters.adjust(counters.PENDING_REQUESTS, -claimed)
+            fragments.bump()
+            reorder.check(totals)
+    return outcomes
+
+
+def bulk_approve(request_ids, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Approve many pending requests, one transaction per chunk.
+
+    Each chunk aggregates the requested quantity per item and deducts it with a
+    single guarded UPDATE. Requests that would oversell are skipped. Returns a
+    ``{request_id: outcome}`` mapping.
+    """
+    outcomes = {}
+    for ids in _chunks(request_ids, chunk_size):
+        try:
+            outcomes.update(_approve_chunk(ids))
+        except _StockChanged:
+            # Someone else touched the same rows mid-chunk; settle it one by one.
+            outcomes.update({pk: NOT_PENDING for pk in ids})
+            pending = RequestItem.objects.filter(pk__in=ids, status='pending').order_by('created_at', 'pk')
+            for req in pending:
+                outcomes[req.pk] = approve_request(req)
+    return outcomes
+
+
+def bulk_reject(request_ids, chunk_size=BULK_CHUNK_SIZE):
+    """Reject many pending requests. Returns a ``{request_id: outcome}`` mapping."""
+    outcomes = {}
+    for ids in _chunks(request_ids, chunk_size):
+        with transaction.atomic():
+            pending = list(
+                RequestItem.objects
+                .select_for_update()
+                .filter(pk__in=ids, status='pending')
+                .values_list('pk', flat=True)
+            )
+            rejected = RequestItem.objects.filter(pk__in=pending).update(status='rejected', updated_at=timezone.now())
+            counters.adjust(counters.PENDING_REQUESTS, -rejected)
+        outcomes.update({pk: NOT_PENDING for pk in ids})
+        outcomes.update({pk: REJECTED for pk in pending})
+    return outcomes
@@ -0,0 +1,43 @@
+# inventory/testing.py
+"""
+Test runner that keeps the suite off the files the running site shares.
+
+The cache (and with it every session) and the channel layer are SQLite
+files under BASE_DIR, and tests clear the cache freely. For the length of
+the run this points them, and MEDIA_ROOT, at a scratch directory instead.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = tempfile.TemporaryDirectory()
+        scratch = self._scratch.name
+        caches = {
+            alias: {**config, 'LOCATION': os.path.join(scratch, f'cache-{alias}.sqlite3')}
+            if config['BACKEND'] == 'inventory.cache.TwoTierCache' else config
+            for alias, config in settings.CACHES.items()
+        }
+        layers = {
+            alias: {
+                **config,
+                'CONFIG': {**config.get('CONFIG', {}), 'path': os.path.join(scratch, f'channels-{alias}.sqlite3')},
+            }
+            if config['BACKEND'] == 'inventory.layers.SQLiteChannelLayer' else config
+            for alias, config in settings.CHANNEL_LAYERS.items()
+        }
+        self._override = override_settings(
+            CACHES=caches, CHANNEL_LAYERS=layers, MEDIA_ROOT=os.path.join(scratch, 'media'),
+        )
+        self._override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._override.disable()
+        self._scratch.cleanup()
+        super().teardown_test_environment(**kwargs)
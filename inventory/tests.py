@@ -1,3 +1,1375 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent import futures
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import (
+    counters, exports, fanout, forms, fragments, importer, ledger, metrics, pdf, qr, reorder, retention, routers,
+    search, services, unread, views,
+)
+from .cache import TwoTierCache
+from .layers import SQLiteChannelLayer
+from .models import (
+    CustomUser, DashboardCounter, InventoryItem, Notification, NotificationArchive, RequestItem, StockMovement,
+    StockSnapshot,
+)
+
+
+class ApproveRequestServiceTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='requester', password='pass')
+        self.item = InventoryItem.objects.create(name='Stapler', quantity=5)
+
+    def make_request(self, quantity):
+        return RequestItem.objects.create(requester=self.user, item=self.item, quantity=quantity)
+
+    def test_approve_deducts_stock_and_updates_status(self):
+        req = self.make_request(3)
+        self.assertEqual(services.approve_request(req), services.APPROVED)
+        self.item.refresh_from_db()
+        req.refresh_from_db()
+        self.assertEqual(self.item.quantity, 2)
+        self.assertEqual(req.status, 'approved')
+
+    def test_approve_twice_only_deducts_once(self):
+        req = self.make_request(2)
+        stale = RequestItem.objects.get(pk=req.pk)
+        services.approve_request(req)
+        self.assertEqual(services.approve_request(stale), services.ALREADY_APPROVED)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 3)
+
+    def test_competing_approvals_cannot_oversell(self):
+        first, second = self.make_request(4), self.make_request(4)
+        self.assertEqual(services.approve_request(first), services.APPROVED)
+        self.assertEqual(services.approve_request(second), services.INSUFFICIENT_STOCK)
+        self.item.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.item.quantity, 1)
+        self.assertEqual(second.status, 'pending')
+
+
+class BulkRequestActionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='requester', password='pass')
+        self.drill = InventoryItem.objects.create(name='Drill', quantity=5)
+        self.tape = InventoryItem.objects.create(name='Tape', quantity=10)
+
+    def make_request(self, item, quantity, status='pending'):
+        return RequestItem.objects.create(requester=self.user, item=item, quantity=quantity, status=status)
+
+    def test_bulk_approve_aggregates_per_item_and_skips_oversell(self):
+        first = self.make_request(self.drill, 3)
+        second = self.make_request(self.drill, 3)
+        third = self.make_request(self.drill, 2)
+        tape = self.make_request(self.tape, 4)
+        done = self.make_request(self.tape, 1, status='approved')
+
+        outcomes = services.bulk_approve([first.pk, second.pk, third.pk, tape.pk, done.pk], chunk_size=2)
+
+        self.assertEqual(outcomes, {
+            first.pk: services.APPROVED,
+            second.pk: services.INSUFFICIENT_STOCK,
+            third.pk: services.APPROVED,
+            tape.pk: services.APPROVED,
+            done.pk: services.NOT_PENDING,
+        })
+        self.drill.refresh_from_db()
+        self.tape.refresh_from_db()
+        self.assertEqual(self.drill.quantity, 0)
+        self.assertEqual(self.tape.quantity, 6)
+        self.assertEqual(RequestItem.objects.get(pk=second.pk).status, 'pending')
+
+    def test_bulk_reject_only_touches_pending(self):
+        pending = self.make_request(self.drill, 1)
+        approved = self.make_request(self.drill, 1, status='approved')
+        outcomes = services.bulk_reject([pending.pk, approved.pk])
+        self.assertEqual(outcomes, {pending.pk: services.REJECTED, approved.pk: services.NOT_PENDING})
+        self.assertEqual(RequestItem.objects.get(pk=approved.pk).status, 'approved')
+
+    def test_view_approves_all_pending_and_returns_summary(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(admin)
+        self.make_request(self.drill, 2)
+        self.make_request(self.tape, 20)
+
+        response = self.client.post(
+            '/requests/bulk/',
+            {'action': 'approve', 'select_all_pending': '1'},
+            HTTP_ACCEPT='application/json',
+        )
+
+        self.assertEqual(response.json()['summary'], {'approved': 1, 'insufficient_stock': 1})
+
+    def test_view_rejects_malformed_filters(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(admin)
+        pending = self.make_request(self.drill, 2)
+
+        response = self.client.post('/requests/bulk/', {'action': 'approve', 'select_all_pending': '1', 'item': 'x'})
+        self.assertRedirects(response, '/manage_requests/', fetch_redirect_response=False)
+        response = self.client.post(
+            '/requests/bulk/', {'action': 'approve', 'select_all_pending': '1', 'requester': '1; --'},
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(RequestItem.objects.get(pk=pending.pk).status, 'pending')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'user{CustomUser.objects.count()}_{n}') for n in range(count)
+        )
+        items = InventoryItem.objects.bulk_create(
+            InventoryItem(name=f'Item {n}', quantity=n) for n in range(count)
+        )
+        RequestItem.objects.bulk_create(
+            RequestItem(requester=user, item=item, quantity=1) for user, item in zip(users, items)
+        )
+
+    def count_queries(self, url):
+        # bulk_create() skips the signals that retire the cached table.
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        return len(ctx)
+
+    def test_manage_pages_run_fixed_number_of_queries(self):
+        for url in ('/manage_inventory/', '/manage_requests/', '/manage-users/'):
+            with self.subTest(url=url):
+                self.add_rows(3)
+                small = self.count_queries(url)
+                self.add_rows(120)
+                self.assertEqual(self.count_queries(url), small)
+
+    def test_cursor_walks_every_row_once(self):
+        self.add_rows(120)
+        seen, url = [], '/manage_inventory/'
+        while url:
+            page = self.client.get(url).context['items']
+            seen.extend(item.pk for item in page)
+            url = page.next_url
+        self.assertEqual(sorted(seen), sorted(InventoryItem.objects.values_list('pk', flat=True)))
+
+
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Low-stock alerts are queued for the fan-out thread on commit.
+        patcher = mock.patch.object(fanout.dispatcher, 'submit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        counters.reconcile()
+        self.user = CustomUser.objects.create_user(username='requester', password='pass')
+
+    def test_counters_follow_creates_status_changes_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = InventoryItem.objects.create(name='Ladder', quantity=3)
+            approve_me = RequestItem.objects.create(requester=self.user, item=item, quantity=1)
+            reject_me = RequestItem.objects.create(requester=self.user, item=item, quantity=1)
+            RequestItem.objects.create(requester=self.user, item=item, quantity=1)
+            services.approve_request(approve_me)
+            reject_me.status = 'rejected'
+            reject_me.save()
+        self.assertEqual(counters.get_counts(), counters.compute())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+            self.user.delete()
+        self.assertEqual(counters.get_counts(), counters.compute())
+
+    def test_dashboard_reads_counters_without_counting(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(admin)
+        self.client.get('/admin_dashboard/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin_dashboard/')
+        self.assertEqual(response.context['total_users'], 2)
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql']])
+
+    def test_reconcile_command_fixes_drift(self):
+        DashboardCounter.objects.filter(name=counters.TOTAL_USERS).update(value=99)
+        call_command('reconcile_counters', stdout=open(os.devnull, 'w'))
+        self.assertEqual(counters.get_counts()[counters.TOTAL_USERS], 1)
+
+
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        self.admins = [
+            CustomUser.objects.create_user(username=f'admin{n}', password='pass', is_staff=True)
+            for n in range(3)
+        ]
+        self.user = CustomUser.objects.create_user(username='requester', password='pass')
+        self.item = InventoryItem.objects.create(name='Projector', quantity=2)
+
+    def test_request_item_queues_fanout_instead_of_writing_inline(self):
+        dispatcher = fanout.Dispatcher(background=False)
+        self.client.force_login(self.user)
+        with mock.patch.object(fanout, 'dispatcher', dispatcher), self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/request-item/', {'item': self.item.pk, 'quantity': 1})
+        self.assertFalse(Notification.objects.exists())
+
+        dispatcher.flush()
+        self.assertEqual(Notification.objects.filter(user__is_staff=True).count(), 3)
+
+    def test_burst_is_one_insert_and_one_push_per_admin(self):
+        dispatcher = fanout.Dispatcher(background=False)
+        for n in range(5):
+            dispatcher.submit(f"request {n}")
+        with mock.patch.object(fanout, 'send_real_time_notifications') as push, \
+                CaptureQueriesContext(connection) as ctx:
+            dispatcher.flush()
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Notification.objects.count(), 15)
+        push.assert_called_once()
+        pushes = push.call_args.args[0]
+        self.assertEqual(len(pushes), 3)
+        self.assertEqual(pushes[0][1], "5 new item requests")
+
+    def test_each_kind_is_pushed_under_its_own_title(self):
+        dispatcher = fanout.Dispatcher(background=False)
+        dispatcher.submit("alice requested Tape")
+        dispatcher.submit("Low stock: Tape is down to 1 (reorder level 5).", fanout.LOW_STOCK)
+        with mock.patch.object(fanout, 'send_real_time_notifications') as push:
+            dispatcher.flush()
+        titles = {(title, body) for _, title, body in push.call_args.args[0]}
+        self.assertEqual(titles, {
+            ("New item request", "alice requested Tape"),
+            ("Low stock", "Low stock: Tape is down to 1 (reorder level 5)."),
+        })
+
+    def test_shutdown_stores_messages_the_thread_had_not_written(self):
+        dispatcher = fanout.Dispatcher(interval=60)
+        with mock.patch.object(fanout, 'send_real_time_notifications') as push:
+            dispatcher.submit("request during exit")
+            dispatcher.shutdown()
+        self.assertFalse(dispatcher._thread.is_alive())
+        self.assertEqual(Notification.objects.filter(message="request during exit").count(), 3)
+        push.assert_not_called()
+
+    def test_failed_write_keeps_the_batch_for_the_next_flush(self):
+        dispatcher = fanout.Dispatcher(background=False)
+        dispatcher.submit("first")
+        dispatcher.submit("second")
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                dispatcher.flush(push=False)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(dispatcher.flush(push=False)), 6)
+        self.assertEqual(sorted(Notification.objects.values_list('message', flat=True).distinct()), ['first', 'second'])
+
+
+class QueryPlanTests(TestCase):
+    """Run each view's SQL through EXPLAIN QUERY PLAN and reject full table scans."""
+
+    # Fixed-size tables that are fine to scan
+    SMALL_TABLES = {'inventory_dashboardcounter'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        users = CustomUser.objects.bulk_create(CustomUser(username=f'user{n}') for n in range(60))
+        items = InventoryItem.objects.bulk_create(InventoryItem(name=f'Item {n}', quantity=n) for n in range(60))
+        RequestItem.objects.bulk_create(
+            RequestItem(requester=user, item=item, quantity=1) for user, item in zip(users, items)
+        )
+        Notification.objects.bulk_create(Notification(user=cls.admin, message=f'note {n}') for n in range(60))
+
+    def setUp(self):
+        # A cached table would skip the queries under test.
+        cache.clear()
+
+    def plan_problems(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+        problems = []
+        for detail in details:
+            scanned = re.match(r'SCAN (\w+)$', detail)
+            if scanned and scanned.group(1) not in self.SMALL_TABLES:
+                problems.append(detail)
+            if 'USE TEMP B-TREE' in detail:
+                problems.append(detail)
+        return problems
+
+    def assert_indexed(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in ctx.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assertEqual(self.plan_problems(query['sql']), [], query['sql'])
+        return response
+
+    def test_views_use_indexes(self):
+        self.client.force_login(self.admin)
+        for url in (
+            '/admin_dashboard/',
+            '/user_dashboard/',
+            '/notifications/',
+            '/manage_inventory/',
+            '/manage_requests/',
+            '/manage-users/',
+            '/generate-report/?start_date=2024-01-01&end_date=2024-12-31',
+            '/generate-report/?search=item',
+        ):
+            with self.subTest(url=url):
+                context = self.assert_indexed(url).context
+                for page in (context.get(key) for key in ('items', 'requests', 'users', 'notifications')):
+                    if getattr(page, 'has_next', False):
+                        self.assert_indexed(page.next_url)
+
+
+class InventorySearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.drill = InventoryItem.objects.create(name='Cordless Drill', category='Power Tools', location='Aisle 4', quantity=3)
+        self.bits = InventoryItem.objects.create(name='Drill Bits', category='Accessories', location='Aisle 4', quantity=30)
+        self.paper = InventoryItem.objects.create(name='Printer Paper', category='Office', location='Store Room', quantity=9)
+
+    def names(self, text):
+        return [item.name for item in search.search_items(InventoryItem.objects.all(), text)]
+
+    def test_prefix_terms_match_across_fields(self):
+        self.assertEqual(sorted(self.names('dri')), ['Cordless Drill', 'Drill Bits'])
+        self.assertEqual(self.names('drill power'), ['Cordless Drill'])
+        self.assertEqual(self.names('store'), ['Printer Paper'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.paper.name = 'Copier Paper'
+        self.paper.save()
+        self.bits.delete()
+        self.assertEqual(self.names('printer'), [])
+        self.assertEqual(self.names('copier'), ['Copier Paper'])
+        self.assertEqual(self.names('bits'), [])
+
+    def test_fts_operators_in_input_are_treated_as_text(self):
+        self.assertEqual(self.names('drill" OR "paper'), [])
+
+    def test_contains_backend_matches_the_same_items(self):
+        backend = search.ContainsBackend()
+        found = backend.search(InventoryItem.objects.all(), 'aisle drill')
+        self.assertEqual(sorted(item.name for item in found), ['Cordless Drill', 'Drill Bits'])
+
+    def test_report_date_range_includes_whole_end_day(self):
+        user = CustomUser.objects.create_user(username='viewer', password='pass')
+        self.client.force_login(user)
+        InventoryItem.objects.filter(pk=self.drill.pk).update(
+            created_at=datetime(2025, 3, 31, 23, 59, tzinfo=dt_timezone.utc))
+        InventoryItem.objects.filter(pk=self.bits.pk).update(
+            created_at=datetime(2025, 4, 1, 0, 0, tzinfo=dt_timezone.utc))
+        response = self.client.get('/generate-report/', {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertEqual([item.name for item in response.context['items']], ['Cordless Drill'])
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(CustomUser.objects.create_user(username='viewer', password='pass'))
+        InventoryItem.objects.create(name='Cordless Drill', category='Power Tools', location='Aisle 4', quantity=3)
+        InventoryItem.objects.create(name='Printer Paper', quantity=9)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get('/generate-report/', {'search': 'drill', 'export': 'csv'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], exports.HEADER)
+        self.assertEqual([row[:4] for row in rows[1:]], [['Cordless Drill', 'Power Tools', '3', 'Aisle 4']])
+
+    def test_csv_export_without_filters_includes_everything(self):
+        response = self.client.get('/generate-report/', {'export': 'csv'})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 3)
+
+    async def test_csv_export_streams_under_asgi(self):
+        await self.async_client.aforce_login(await CustomUser.objects.aget(username='viewer'))
+        with mock.patch.object(exports, 'CHUNK_SIZE', 1):
+            response = await self.async_client.get('/generate-report/', {'export': 'csv'})
+            # An async iterator is what the ASGI handler sends chunk by chunk.
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(b''.join(chunks).decode().splitlines()), 3)
+
+    def test_xlsx_button_only_shows_when_openpyxl_is_installed(self):
+        for available in (False, True):
+            with self.subTest(available=available), mock.patch.object(exports, 'XLSX_AVAILABLE', available):
+                response = self.client.get('/generate-report/')
+                self.assertEqual('export=xlsx' in response.content.decode(), available)
+
+
+class ScratchCacheDirMixin:
+    """Points the ``cache_dir_setting`` disk cache at an empty directory for each test."""
+
+    cache_dir_setting = None
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = self.settings(**{self.cache_dir_setting: tmp.name})
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class PdfExportTests(ScratchCacheDirMixin, TestCase):
+    cache_dir_setting = 'PDF_CACHE_DIR'
+
+    def setUp(self):
+        super().setUp()
+        user = CustomUser.objects.create_user(username='viewer', password='pass')
+        self.client.force_login(user)
+        self.item = InventoryItem.objects.create(name='Generator', quantity=1, location='Yard')
+
+    def test_pdf_is_rendered_in_background_then_served_from_cache(self):
+        response = self.client.get(f'/item-report/pdf/{self.item.pk}/')
+        self.assertEqual(response.status_code, 302)
+        job_id = response.url.rstrip('/').rsplit('/', 1)[-1]
+        self.assertEqual(pdf.wait(job_id, timeout=60), pdf.DONE)
+
+        status = self.client.get(response.url, HTTP_ACCEPT='application/json')
+        self.assertEqual(status.json(), {'job': job_id, 'status': pdf.DONE})
+
+        with mock.patch.object(pdf, '_get_pool') as pool:
+            cached = self.client.get(f'/item-report/pdf/{self.item.pk}/')
+        pool.assert_not_called()
+        self.assertEqual(cached['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(cached.streaming_content).startswith(b'%PDF'))
+
+    def test_changed_item_gets_a_new_job(self):
+        first = self.client.get(f'/item-report/pdf/{self.item.pk}/').url
+        self.item.location = 'Warehouse'
+        self.item.save()
+        second = self.client.get(f'/item-report/pdf/{self.item.pk}/').url
+        self.assertNotEqual(first, second)
+        for url in (first, second):
+            pdf.wait(url.rstrip('/').rsplit('/', 1)[-1], timeout=60)
+
+    def test_disk_cache_keeps_the_most_recently_requested_pdfs(self):
+        htmls = [f'<p>{n}</p>' for n in range(4)]
+        paths = [pdf.pdf_path(pdf.job_id_for(html)) for html in htmls]
+        for age, path in enumerate(reversed(paths)):
+            path.write_bytes(b'%PDF')
+            os.utime(path, (time.time() - 100 * (age + 1),) * 2)
+        pdf.submit(htmls[0])  # a cache hit makes the oldest file the newest
+
+        with self.settings(PDF_CACHE_MAX_FILES=2):
+            self.assertEqual(pdf.prune_cache(), 2)
+        self.assertEqual([path.exists() for path in paths], [True, False, False, True])
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get(f'/item-report/pdf/jobs/{"0" * 64}/').status_code, 404)
+        self.assertEqual(self.client.get('/item-report/pdf/jobs/../').status_code, 404)
+
+
+class QrCodeTests(ScratchCacheDirMixin, TestCase):
+    cache_dir_setting = 'QR_CACHE_DIR'
+
+    def setUp(self):
+        super().setUp()
+        qr._memory.clear()
+        user = CustomUser.objects.create_user(username='viewer', password='pass')
+        self.client.force_login(user)
+        item = InventoryItem.objects.create(name='Generator', quantity=1, location='Yard')
+        self.req = RequestItem.objects.create(requester=user, item=item, quantity=1)
+
+    def test_report_links_to_cached_image_instead_of_inlining(self):
+        with mock.patch.object(qr, 'render_png', wraps=qr.render_png) as render_png:
+            first = self.client.get(f'/request-report/{self.req.pk}/')
+            self.client.get(f'/request-report/{self.req.pk}/')
+            qr._memory.clear()
+            self.client.get(f'/request-report/{self.req.pk}/')
+        self.assertEqual(render_png.call_count, 1)
+        url = first.context['qr_code_url']
+        self.assertTrue(url.startswith('/qr/'))
+        self.assertNotContains(first, 'data:image/png;base64')
+
+        image = self.client.get(url)
+        self.assertEqual(image['Content-Type'], 'image/png')
+        self.assertIn('immutable', image['Cache-Control'])
+        self.assertTrue(image.content.startswith(b'\x89PNG'))
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=image['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_disk_cache_keeps_the_most_recently_used_images(self):
+        payloads = [f'payload {n}' for n in range(4)]
+        paths = [qr.cache_dir() / f'{qr.register(data)}.png' for data in payloads]
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (time.time() - 100 * (age + 1),) * 2)
+        qr.register(payloads[0])  # registering again makes the oldest image the newest
+
+        with self.settings(QR_CACHE_MAX_FILES=2):
+            self.assertEqual(qr.prune_cache(), 2)
+        self.assertEqual([path.exists() for path in paths], [True, False, False, True])
+
+        qr._memory.clear()
+        self.assertIsNone(qr.load(qr.key_for(payloads[1])))
+        qr.register(payloads[1])
+        self.assertTrue(paths[1].exists())
+
+    def test_concurrent_registers_of_a_new_payload_all_succeed(self):
+        barrier = threading.Barrier(8)
+        errors = []
+
+        def register():
+            barrier.wait()
+            try:
+                qr.register('shared payload')
+            except Exception as exc:
+                errors.append(exc)
+
+        def slow_png(data):
+            # Lines the threads' writes up.
+            time.sleep(0.05)
+            return b'\x89PNG'
+
+        with mock.patch.object(qr, 'render_png', side_effect=slow_png):
+            threads = [threading.Thread(target=register) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual([path.suffix for path in qr.cache_dir().iterdir()], ['.png'])
+
+    def test_unknown_key_is_404(self):
+        self.assertEqual(self.client.get(f'/qr/{"a" * 64}.png').status_code, 404)
+
+
+class BatchPdfReportTests(ScratchCacheDirMixin, TestCase):
+    cache_dir_setting = 'PDF_CACHE_DIR'
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(CustomUser.objects.create_user(username='auditor', password='pass'))
+        for n in range(3):
+            InventoryItem.objects.create(name=f'Helmet {n}', category='Safety', quantity=n)
+        InventoryItem.objects.create(name='Paper', category='Office', quantity=1)
+
+    def test_zip_holds_one_pdf_per_filtered_item(self):
+        response = self.client.get('/item-report/pdf/batch/', {'category': 'Safety'})
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        names = archive.namelist()
+        self.assertEqual(sorted(name.split('-', 1)[1] for name in names),
+                         ['helmet-0.pdf', 'helmet-1.pdf', 'helmet-2.pdf'])
+        for name in names:
+            self.assertTrue(archive.read(name).startswith(b'%PDF'))
+
+    def test_pdf_pruned_before_it_is_zipped_is_listed_in_errors(self):
+        pages = [('kept.pdf', '<p>kept</p>'), ('pruned.pdf', '<p>pruned</p>')]
+        for _, html in pages:
+            pdf.pdf_path(pdf.job_id_for(html)).write_bytes(b'%PDF')
+        pruned = pdf.pdf_path(pdf.job_id_for(pages[1][1]))
+
+        def status(job_id):
+            pruned.unlink(missing_ok=True)
+            return pdf.DONE
+
+        with mock.patch.object(pdf, 'status', status):
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(pdf.iter_zip(pages))))
+        self.assertEqual(archive.namelist(), ['kept.pdf', 'errors.txt'])
+        self.assertIn('pruned.pdf', archive.read('errors.txt').decode())
+
+    def test_concurrent_submits_render_once(self):
+        pool = mock.Mock()
+        pool.submit.return_value = future = futures.Future()
+        barrier = threading.Barrier(8)
+
+        def submit():
+            barrier.wait()
+            pdf.submit('<p>once</p>')
+
+        with mock.patch.object(pdf, '_get_pool', return_value=pool):
+            threads = [threading.Thread(target=submit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        future.set_result(False)
+        self.assertEqual(pool.submit.call_count, 1)
+
+    async def test_zip_streams_under_asgi(self):
+        await self.async_client.aforce_login(await CustomUser.objects.aget(username='auditor'))
+        response = await self.async_client.get('/item-report/pdf/batch/', {'category': 'Safety'})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(zipfile.ZipFile(io.BytesIO(b''.join(chunks))).namelist()), 3)
+
+
+class InventoryImportTests(TestCase):
+    CSV = (
+        "name,quantity,category,location\n"
+        "Hammer,5,Tools,Aisle 1\n"
+        "Hammer,7,Tools,Aisle 2\n"
+        ",3,Tools,Aisle 1\n"
+        "Saw,-1,Tools,\n"
+        "Saw,two,Tools,\n"
+        "Glue,4,,\n"
+    )
+
+    def test_upserts_by_name_and_location_and_reports_bad_rows(self):
+        existing = InventoryItem.objects.create(name='Hammer', location='Aisle 1', quantity=1)
+        result = importer.import_csv(io.StringIO(self.CSV), batch_size=2)
+
+        self.assertEqual((result.created, result.updated), (2, 1))
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        existing.refresh_from_db()
+        self.assertEqual((existing.quantity, existing.category), (5, 'Tools'))
+        self.assertEqual(InventoryItem.objects.get(name='Glue').location, None)
+        self.assertEqual([item.name for item in search.search_items(InventoryItem.objects.all(), 'glue')], ['Glue'])
+
+    def test_reimport_is_idempotent(self):
+        importer.import_csv(io.StringIO(self.CSV))
+        result = importer.import_csv(io.StringIO(self.CSV))
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 3))
+        self.assertEqual(InventoryItem.objects.count(), 3)
+
+    def test_low_stock_is_announced_once_per_import(self):
+        InventoryItem.objects.create(name='Tape', quantity=10)
+        lines = "name,quantity\nTape,2\n" + "".join(f"Part {n},{n % 3}\n" for n in range(30))
+        with mock.patch.object(fanout, 'notify_admins') as notify:
+            result = importer.import_csv(io.StringIO(lines), batch_size=7)
+        self.assertEqual(result.low_stock, 31)
+        notify.assert_called_once_with(
+            "Low stock: the import left 31 item(s) below their reorder level.", fanout.LOW_STOCK)
+        self.assertFalse(InventoryItem.objects.filter(reorder_alerted=False, quantity__lt=5).exists())
+
+    def test_missing_columns_are_rejected(self):
+        result = importer.import_csv(io.StringIO("name,category\nHammer,Tools\n"))
+        self.assertEqual(result.errors, [(1, "missing column(s): quantity")])
+
+    def test_upload_view(self):
+        self.client.force_login(CustomUser.objects.create_user(username='boss', password='pass', is_staff=True))
+        upload = SimpleUploadedFile('items.csv', self.CSV.encode('utf-8-sig'), content_type='text/csv')
+        response = self.client.post('/manage-inventory/import/', {'file': upload})
+        self.assertEqual(response.context['result'].created, 3)
+        self.assertEqual(len(response.context['result'].errors), 3)
+
+    def test_unreadable_file_stops_the_import_with_a_message(self):
+        self.client.force_login(CustomUser.objects.create_user(username='boss', password='pass', is_staff=True))
+        upload = SimpleUploadedFile('items.csv', "name,quantity\nCafé,1\n".encode('latin-1'), content_type='text/csv')
+        response = self.client.post('/manage-inventory/import/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['result'].incomplete)
+        self.assertEqual([m.level_tag for m in response.context['messages']], ['error'])
+        self.assertContains(response, 'could not be read')
+
+    def test_rows_before_a_malformed_line_are_imported(self):
+        oversized = 'x' * (csv.field_size_limit() + 1)
+        result = importer.import_csv(io.StringIO(f'name,quantity\nTape,1\n{oversized},2\nRope,3\n'))
+        self.assertTrue(result.incomplete)
+        self.assertEqual(result.errors[0][0], 3)
+        self.assertEqual(list(InventoryItem.objects.values_list('name', flat=True)), ['Tape'])
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def at(self, day, hour=12):
+        return datetime(2025, 1, day, hour, tzinfo=dt_timezone.utc)
+
+    def test_add_edit_and_approve_are_recorded(self):
+        self.client.post('/add-item/', {'name': 'Rope', 'quantity': 10})
+        item = InventoryItem.objects.get(name='Rope')
+        self.client.post(f'/manage-inventory/edit/{item.pk}/', {'name': 'Rope', 'quantity': 12})
+        req = RequestItem.objects.create(requester=self.admin, item=item, quantity=5)
+        services.approve_request(req)
+        other = RequestItem.objects.create(requester=self.admin, item=item, quantity=3)
+        services.bulk_approve([other.pk])
+
+        self.assertEqual(
+            list(item.movements.order_by('pk').values_list('delta', 'reason')),
+            [(10, 'initial'), (2, 'adjustment'), (-5, 'request'), (-3, 'request')],
+        )
+        item.refresh_from_db()
+        self.assertEqual(ledger.stock_at(item, timezone.now()), item.quantity)
+
+    def test_edit_racing_an_approval_keeps_the_ledger_in_step(self):
+        self.client.post('/add-item/', {'name': 'Rope', 'quantity': 10})
+        item = InventoryItem.objects.get(name='Rope')
+        req = RequestItem.objects.create(requester=self.admin, item=item, quantity=4)
+        is_valid = forms.InventoryItemForm.is_valid
+
+        def approve_then_validate(form):
+            # The approval commits after the view loaded the item.
+            services.approve_request(req)
+            return is_valid(form)
+
+        with mock.patch.object(forms.InventoryItemForm, 'is_valid', approve_then_validate):
+            self.client.post(f'/manage-inventory/edit/{item.pk}/', {'name': 'Rope', 'quantity': 12})
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 12)
+        self.assertEqual(list(item.movements.order_by('pk').values_list('delta', flat=True)), [10, -4, 6])
+        self.assertEqual(ledger.stock_at(item, timezone.now()), 12)
+
+    def test_stock_at_replays_from_nearest_snapshot(self):
+        item = InventoryItem.objects.create(name='Rope', quantity=4)
+        StockSnapshot.objects.create(item=item, quantity=10, taken_at=self.at(2))
+        for day, delta in ((1, 10), (3, -2), (4, -4)):
+            StockMovement.objects.create(item=item, delta=delta, reason='adjustment', created_at=self.at(day))
+
+        self.assertEqual(ledger.stock_at(item, self.at(1, 6)), 0)
+        self.assertEqual(ledger.stock_at(item, self.at(1, 18)), 10)
+        self.assertEqual(ledger.stock_at(item, self.at(3, 18)), 8)
+        self.assertEqual(ledger.stock_at(item, self.at(5)), 4)
+        self.assertEqual(
+            [m.delta for m in ledger.movements_between(item, self.at(2), self.at(5))], [-2, -4])
+
+    def test_stock_before_first_snapshot_is_rewound(self):
+        item = InventoryItem.objects.create(name='Rope', quantity=7)
+        StockSnapshot.objects.create(item=item, quantity=9, taken_at=self.at(5))
+        StockMovement.objects.create(item=item, delta=-2, reason='request', created_at=self.at(3))
+        self.assertEqual(ledger.stock_at(item, self.at(2)), 11)
+
+    def test_snapshots_only_cover_items_that_moved(self):
+        still = InventoryItem.objects.create(name='Still', quantity=1)
+        busy = InventoryItem.objects.create(name='Busy', quantity=1)
+        self.assertEqual(ledger.take_snapshots(), 2)
+        ledger.record(busy.pk, 3, 'adjustment')
+        self.assertEqual(ledger.take_snapshots(), 1)
+        self.assertEqual(still.snapshots.count(), 1)
+        self.assertEqual(busy.snapshots.count(), 2)
+
+    def test_import_records_movements(self):
+        existing = InventoryItem.objects.create(name='Rope', quantity=2)
+        importer.import_csv(io.StringIO("name,quantity\nRope,5\nTwine,8\n"))
+        self.assertEqual(list(existing.movements.values_list('delta', 'reason')), [(3, 'import')])
+        self.assertEqual(
+            list(InventoryItem.objects.get(name='Twine').movements.values_list('delta', 'reason')), [(8, 'import')])
+
+
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.location = os.path.join(tmp.name, 'cache.sqlite3')
+
+    def worker(self, **options):
+        """A backend with its own local tier, standing in for another process."""
+        with mock.patch.dict('inventory.cache._tiers', clear=True):
+            return TwoTierCache(self.location, {'OPTIONS': {'SYNC_INTERVAL': 0, **options}})
+
+    def test_workers_share_values(self):
+        a, b = self.worker(), self.worker()
+        a.set('k', {'n': 1})
+        self.assertEqual(b.get('k'), {'n': 1})
+        self.assertTrue(b.add('fresh', 1))
+        self.assertFalse(a.add('fresh', 2))
+        self.assertEqual(a.get('fresh'), 1)
+
+    def test_writes_invalidate_other_local_tiers(self):
+        a, b = self.worker(), self.worker()
+        a.set('k', 1)
+        self.assertEqual(b.get('k'), 1)
+        self.assertIn(b.make_key('k'), b._local)
+        a.set('k', 2)
+        self.assertEqual(b.get('k'), 2)
+        a.delete('k')
+        self.assertIsNone(b.get('k'))
+        b.set('k', 3)
+        a.clear()
+        self.assertIsNone(b.get('k'))
+
+    def test_local_tier_is_bounded_and_respects_expiry(self):
+        a = self.worker(LOCAL_MAX_ENTRIES=2)
+        for n in range(5):
+            a.set(f'k{n}', n)
+        self.assertEqual(len(a._local), 2)
+        self.assertEqual(a.get('k0'), 0)
+        a.set('gone', 1, timeout=0)
+        self.assertIsNone(a.get('gone'))
+        a.set('short', 1, timeout=60)
+        self.assertEqual(a.get('short'), 1)
+        with mock.patch('inventory.cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(a.get('short'))
+
+    def test_incr_is_atomic_across_workers(self):
+        a, b = self.worker(), self.worker()
+        a.set('n', 1)
+        self.assertEqual(b.get('n'), 1)
+        # b's local copy is now stale, but the increment happens in the shared file.
+        self.assertEqual(a.incr('n'), 2)
+        self.assertEqual(b.incr('n'), 3)
+        self.assertEqual(async_to_sync(a.adecr)('n', 5), -2)
+        self.assertEqual((a.get('n'), b.get('n')), (-2, -2))
+        with self.assertRaises(ValueError):
+            a.incr('missing')
+        a.set('big', 2**70)
+        self.assertEqual(b.incr('big'), 2**70 + 1)
+
+    def test_shared_file_is_culled_soonest_to_expire_first(self):
+        a, b = self.worker(MAX_ENTRIES=4, CULL_FREQUENCY=2), self.worker()
+        a.set('session', 1, timeout=None)
+        for n in range(5):
+            a.set(f'fragment{n}', n, timeout=100 + n)
+        self.assertEqual(b.get('fragment0'), 0)
+        with mock.patch('inventory.cache.CULL_EVERY', 1):
+            a.set('fragment5', 5, timeout=200)
+        # Seven entries, over the limit of four: the three soonest to expire go.
+        self.assertEqual([k for k in ['session'] + [f'fragment{n}' for n in range(6)] if a.has_key(k)],
+                         ['session', 'fragment3', 'fragment4', 'fragment5'])
+        self.assertIsNone(b.get('fragment0'))
+
+
+class SQLiteChannelLayerTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'channels.sqlite3')
+
+    def layer(self):
+        return SQLiteChannelLayer(path=self.path, poll_interval=0.01)
+
+    def test_group_send_reaches_channels_of_another_layer(self):
+        reader, writer = self.layer(), self.layer()
+
+        async def scenario():
+            first, second = await reader.new_channel(), await reader.new_channel()
+            await reader.group_add('user_1', first)
+            await reader.group_add('user_2', second)
+            await writer.group_send_many([
+                ('user_1', {'type': 'send_notification', 'n': 1}),
+                ('user_2', {'type': 'send_notification', 'n': 2}),
+                ('user_1', {'type': 'send_notification', 'n': 3}),
+            ])
+            received = [await reader.receive(first), await reader.receive(first), await reader.receive(second)]
+            await reader.group_discard('user_1', first)
+            await writer.group_send('user_1', {'type': 'send_notification', 'n': 4})
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(reader.receive(first), 0.2)
+            return [message['n'] for message in received]
+
+        self.assertEqual(async_to_sync(scenario)(), [1, 3, 2])
+
+    def test_send_respects_capacity(self):
+        layer = SQLiteChannelLayer(path=self.path, capacity=2)
+
+        async def scenario():
+            await layer.send('jobs', {'n': 1})
+            await layer.send('jobs', {'n': 2})
+            with self.assertRaises(ChannelFull):
+                await layer.send('jobs', {'n': 3})
+            return await self.layer().receive('jobs')
+
+        self.assertEqual(async_to_sync(scenario)(), {'n': 1})
+
+    def test_idle_polls_take_no_write_lock(self):
+        store = self.layer().store
+        with mock.patch.object(store, 'transaction', wraps=store.transaction) as transaction:
+            self.assertEqual(store.take(['idle!'], time.time()), [])
+            transaction.assert_not_called()
+            store.send('busy!', 'busy!x', b'body', time.time() + 60, capacity=10)
+            transaction.reset_mock()
+            self.assertEqual(store.take(['busy!'], time.time()), [('busy!x', b'body')])
+            transaction.assert_called_once()
+
+
+class DatabaseRoutingTests(TestCase):
+    def test_read_only_scope_reads_from_replica_and_writes_to_default(self):
+        router = routers.ReadReplicaRouter()
+        with mock.patch.object(routers, '_mirrors_default', return_value=False):
+            self.assertIsNone(router.db_for_read(InventoryItem))
+            with routers.replica_reads():
+                self.assertEqual(router.db_for_read(InventoryItem), 'replica')
+                self.assertEqual(router.db_for_write(InventoryItem), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'inventory'))
+
+    def test_mirrored_replica_reads_through_default(self):
+        self.client.force_login(CustomUser.objects.create_user(username='boss', password='pass', is_staff=True))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/admin_dashboard/')
+        self.assertTrue(ctx.captured_queries)
+
+    def test_connections_apply_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for histogram in metrics.REGISTRY:
+            histogram.clear()
+        self.client.force_login(CustomUser.objects.create_user(username='boss', password='pass', is_staff=True))
+
+    def series(self, name, **labels):
+        wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf'^{name}{{{wanted}}} (\S+)$', metrics.render(), re.M)
+        return float(match.group(1)) if match else None
+
+    def test_views_record_sql_template_and_qr_time(self):
+        item = InventoryItem.objects.create(name='Drill', quantity=3)
+        req = RequestItem.objects.create(requester=CustomUser.objects.get(), item=item, quantity=1)
+        with tempfile.TemporaryDirectory() as tmp, self.settings(QR_CACHE_DIR=tmp):
+            qr._memory.clear()
+            self.client.get(f'/request-report/{req.pk}/')
+
+        view = 'print_request_report'
+        self.assertEqual(self.series('inventory_request_duration_seconds_count', view=view, method='GET'), 1)
+        self.assertGreaterEqual(self.series('inventory_request_sql_queries_sum', view=view), 1)
+        for phase in ('sql', 'template', 'qr'):
+            self.assertGreater(self.series('inventory_request_phase_seconds_sum', view=view, phase=phase), 0)
+
+    def test_metrics_endpoint_is_restricted_to_allowed_addresses(self):
+        self.client.get('/manage_inventory/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('inventory_request_duration_seconds_bucket{view="manage_inventory",method="GET",le="+Inf"} 1',
+                      response.content.decode())
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.9').status_code, 403)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.settings(SLOW_REQUEST_THRESHOLD=0), self.assertLogs('inventory.slow_requests') as logs:
+            self.client.get('/manage_inventory/')
+        self.assertIn('inventory_inventoryitem', logs.output[0])
+
+
+class SeedAndBenchmarkCommandTests(TestCase):
+    def test_seed_data_then_benchmark_views(self):
+        call_command('seed_data', users=6, admins=2, items=40, requests=120, notifications=80, seed=7,
+                     stdout=open(os.devnull, 'w'))
+        self.assertEqual(CustomUser.objects.filter(is_staff=True).count(), 2)
+        self.assertEqual(RequestItem.objects.count(), 120)
+        self.assertEqual(Notification.objects.count(), 80)
+        # Created times are spread out, not all "now".
+        self.assertGreater(Notification.objects.values('created_at').distinct().count(), 1)
+        self.assertEqual(counters.get_counts()[counters.TOTAL_ITEMS], 40)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, 'baseline.json')
+            out = io.StringIO()
+            call_command('benchmark_views', scenarios='login,manage_inventory', concurrency='1', requests=3,
+                         save=baseline, stdout=out)
+            call_command('benchmark_views', scenarios='manage_inventory', concurrency='1', requests=3,
+                         baseline=baseline, stdout=out)
+        self.assertIn('vs baseline', out.getvalue())
+        self.assertRegex(out.getvalue(), r'login\s+1\s+[\d.]+\s+[\d.]+\s+[\d.]+\s+[\d.]+\s+0')
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', is_staff=True)
+        item = InventoryItem.objects.create(name='Drill', quantity=3, category='Tools')
+        RequestItem.objects.create(requester=self.admin, item=item, quantity=1)
+        Notification.objects.create(user=self.admin, message='hello')
+        cache.clear()
+
+    async def test_read_views_run_on_the_event_loop(self):
+        await self.async_client.aforce_login(self.admin)
+        for url in ('/admin_dashboard/', '/user_dashboard/', '/manage_inventory/', '/generate-report/'):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+        response = await self.async_client.get('/admin_dashboard/')
+        self.assertEqual(response.context['total_items'], 1)
+        self.assertEqual(response.context['unread_count'], 1)
+
+        response = await self.async_client.get('/notifications/')
+        self.assertEqual(len(response.context['notifications']), 1)
+        self.assertFalse(await Notification.objects.filter(is_read=False).aexists())
+        response = await self.async_client.get('/generate-report/', {'search': 'dri'})
+        self.assertEqual([item.name for item in response.context['items']], ['Drill'])
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+        self.drill = InventoryItem.objects.create(name='Cordless Drill', category='Tools', quantity=3)
+
+    def get(self, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        item_queries = [q['sql'] for q in ctx.captured_queries if 'inventory_inventoryitem' in q['sql']]
+        return response.content.decode(), item_queries
+
+    def test_inventory_table_is_cached_until_an_item_changes(self):
+        first, queries = self.get('/manage_inventory/')
+        self.assertTrue(queries)
+        again, queries = self.get('/manage_inventory/')
+        self.assertEqual(queries, [])
+        self.assertIn('Cordless Drill', again)
+
+        self.drill.name = 'Hammer Drill'
+        self.drill.save()
+        page, _ = self.get('/manage_inventory/')
+        self.assertIn('Hammer Drill', page)
+        self.drill.delete()
+        page, _ = self.get('/manage_inventory/')
+        self.assertIn('No inventory items found.', page)
+
+    def test_approvals_and_imports_retire_the_cached_table(self):
+        req = RequestItem.objects.create(requester=self.admin, item=self.drill, quantity=2)
+        self.get('/manage_inventory/')
+        services.approve_request(req)
+        page, queries = self.get('/manage_inventory/')
+        self.assertTrue(queries)
+        self.assertIn('<td>1</td>', page)
+        importer.import_csv(io.StringIO('name,quantity\nCordless Drill,40\n'))
+        page, _ = self.get('/manage_inventory/')
+        self.assertIn('<td>40</td>', page)
+
+    def test_cached_rows_carry_no_csrf_token(self):
+        page, _ = self.get('/manage_inventory/')
+        self.assertEqual(page.count('csrfmiddlewaretoken'), 1)
+        key = fragments.make_key('inventory_table', fragments.generation(), None)
+        rows, _ = cache.get(key)
+        self.assertNotIn('csrfmiddlewaretoken', rows)
+        self.assertIn('data-delete-url="/manage-inventory/delete/', rows)
+
+    def test_malformed_cursors_share_the_first_page(self):
+        self.get('/manage_inventory/')
+        for cursor in ('garbage', 'Zm9v', 'x' * 500):
+            with self.subTest(cursor=cursor):
+                _, queries = self.get('/manage_inventory/', {'cursor': cursor})
+                self.assertEqual(queries, [])
+
+    def test_report_page_is_capped(self):
+        InventoryItem.objects.bulk_create(InventoryItem(name=f'Drill {n}', quantity=n) for n in range(3))
+        with mock.patch.object(views, 'REPORT_LIMIT', 2):
+            page, _ = self.get('/generate-report/', {'search': 'drill'})
+            self.assertEqual(page.count('<td>Drill'), 2)
+            self.assertIn('Showing the first 2 items', page)
+            page, _ = self.get('/generate-report/', {'search': 'drill 1'})
+            self.assertNotIn('Showing the first', page)
+
+    def test_report_table_is_keyed_by_normalised_filters(self):
+        InventoryItem.objects.create(name='Printer Paper', quantity=9)
+        page, queries = self.get('/generate-report/', {'search': 'drill'})
+        self.assertTrue(queries)
+        self.assertNotIn('Printer Paper', page)
+        page, queries = self.get('/generate-report/', {'search': '  DRILL  ', 'start_date': ''})
+        self.assertEqual(queries, [])
+        self.assertIn('Cordless Drill', page)
+        page, queries = self.get('/generate-report/', {'search': 'paper'})
+        self.assertTrue(queries)
+        self.assertNotIn('Cordless Drill', page)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+        self.item = InventoryItem.objects.create(name='Drill', quantity=5)
+        self.req = RequestItem.objects.create(requester=self.admin, item=self.item, quantity=2)
+
+    def revalidate(self, url, etag):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, [q['sql'] for q in ctx.captured_queries if 'inventory_inventoryitem' in q['sql']]
+
+    def test_unchanged_tables_answer_304_without_rendering(self):
+        for url in ('/manage_inventory/', '/generate-report/?search=drill'):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertIn('no-cache', first['Cache-Control'])
+                response, queries = self.revalidate(url, first['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(queries, [])
+
+                self.item.quantity = 4
+                self.item.save()
+                response, _ = self.revalidate(url, first['ETag'])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_print_view_follows_request_and_item_changes(self):
+        url = f'/request-report/{self.req.pk}/'
+        first = self.client.get(url)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        # approve_request() writes with queryset updates, which skip auto_now.
+        services.approve_request(self.req)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Approved')
+
+    def test_etag_differs_per_viewer(self):
+        first = self.client.get('/manage_inventory/')
+        other = CustomUser.objects.create_user(username='clerk', password='pass', role='admin', is_staff=True)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get('/manage_inventory/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_etag_changes_when_login_rotates_the_csrf_token(self):
+        first = self.client.get('/manage_inventory/')
+        self.assertEqual(self.client.get('/manage_inventory/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.client.post('/logout/')
+        self.client.post('/', {'username': 'boss', 'password': 'pass'})
+        response = self.client.get('/manage_inventory/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        counters.reconcile()
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def send(self, method, url, rows):
+        with mock.patch.object(fanout.dispatcher, 'submit'), self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, rows, content_type='application/json')
+
+    def test_list_pages_with_sparse_fields_and_report_filters(self):
+        InventoryItem.objects.bulk_create(InventoryItem(name=f'Drill {n}', quantity=n) for n in range(7))
+        InventoryItem.objects.create(name='Paper', quantity=1)
+        seen, url = [], '/api/items/?fields=id,name&search=drill&limit=3'
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                body = self.client.get(url).json()
+            self.assertLessEqual(len(ctx), 3)
+            self.assertTrue(all(set(row) == {'id', 'name'} for row in body['results']))
+            seen.extend(row['name'] for row in body['results'])
+            url = body['next']
+        self.assertEqual(sorted(seen), sorted(f'Drill {n}' for n in range(7)))
+
+        self.assertEqual(self.client.get('/api/items/?fields=secret').status_code, 400)
+        self.assertIn('start_date', self.client.get('/api/items/?start_date=soon').json()['errors'])
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/items/').status_code, 401)
+
+    def test_bulk_item_writes_keep_counters_ledger_and_search(self):
+        response = self.send('post', '/api/items/', [
+            {'name': 'Cordless Drill', 'quantity': 4, 'location': 'Aisle 4'},
+            {'name': 'Ladder', 'quantity': 0},
+        ])
+        self.assertEqual(response.status_code, 201)
+        drill, ladder = response.json()['created']
+        self.assertEqual(counters.get_counts()[counters.TOTAL_ITEMS], 2)
+        self.assertEqual([item.name for item in search.search_items(InventoryItem.objects.all(), 'cordless')],
+                         ['Cordless Drill'])
+
+        response = self.send('patch', '/api/items/', [{'id': drill, 'quantity': 9}, {'id': ladder, 'category': 'Tools'}])
+        self.assertEqual(response.json(), {'updated': [drill, ladder]})
+        self.assertEqual(ledger.stock_at(InventoryItem.objects.get(pk=drill), timezone.now()), 9)
+        self.assertEqual(InventoryItem.objects.get(pk=ladder).category, 'Tools')
+
+        # One bad row rejects the whole batch.
+        response = self.send('post', '/api/items/', [{'name': 'Mop', 'quantity': 1}, {'name': '', 'quantity': -1}])
+        self.assertEqual(set(response.json()['errors']['1']), {'name', 'quantity'})
+        response = self.send('patch', '/api/items/', [{'id': drill, 'quantity': 1}, {'id': 999, 'quantity': 1}])
+        self.assertIn('id', response.json()['errors']['1'])
+        self.assertEqual(InventoryItem.objects.count(), 2)
+        self.assertEqual(InventoryItem.objects.get(pk=drill).quantity, 9)
+
+    def test_requests_are_created_and_decided_in_bulk(self):
+        item = InventoryItem.objects.create(name='Drill', quantity=5)
+        clerk = CustomUser.objects.create_user(username='clerk', password='pass')
+        self.client.force_login(clerk)
+        response = self.send('post', '/api/requests/', [{'item': item.pk, 'quantity': 2}, {'item': item.pk, 'quantity': 4}])
+        first, second = response.json()['created']
+        self.assertEqual(counters.get_counts()[counters.PENDING_REQUESTS], 2)
+        self.assertEqual(self.send('patch', '/api/requests/', [{'id': first, 'status': 'approved'}]).status_code, 403)
+
+        self.client.force_login(self.admin)
+        response = self.send('patch', '/api/requests/', [
+            {'id': first, 'status': 'approved'}, {'id': second, 'status': 'approved'},
+        ])
+        self.assertEqual(response.json()['outcomes'], {str(first): 'approved', str(second): 'insufficient_stock'})
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 3)
+        body = self.client.get('/api/requests/?status=approved&fields=id,item_name,requester_username').json()
+        self.assertEqual(body['results'], [{'id': first, 'item_name': 'Drill', 'requester_username': 'clerk'}])
+
+    def test_notifications_are_per_user(self):
+        mine = Notification.objects.create(user=self.admin, message='mine')
+        theirs = Notification.objects.create(
+            user=CustomUser.objects.create_user(username='clerk', password='pass'), message='theirs')
+        body = self.client.get('/api/notifications/?is_read=false').json()
+        self.assertEqual([row['id'] for row in body['results']], [mine.pk])
+        response = self.send('patch', '/api/notifications/', [{'id': mine.pk, 'is_read': True}, {'id': theirs.pk, 'is_read': True}])
+        self.assertEqual(response.json(), {'updated': 1})
+        self.assertFalse(Notification.objects.get(pk=theirs.pk).is_read)
+        self.assertEqual(self.send('post', '/api/notifications/', []).status_code, 405)
+
+
+class ReorderAlertTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', role='admin', is_staff=True)
+        self.client.force_login(self.admin)
+        self.item = InventoryItem.objects.create(name='Toner', quantity=10, reorder_level=4)
+        self.dispatcher = fanout.Dispatcher(background=False)
+        patcher = mock.patch.object(fanout, 'dispatcher', self.dispatcher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def approve(self, quantity):
+        req = RequestItem.objects.create(requester=self.admin, item=self.item, quantity=quantity)
+        with self.captureOnCommitCallbacks(execute=True):
+            services.approve_request(req)
+
+    def alerts(self):
+        with mock.patch.object(fanout, 'send_real_time_notifications') as push:
+            self.dispatcher.flush()
+        return list(Notification.objects.filter(message__startswith='Low stock').values_list('message', flat=True)), push
+
+    def test_alerts_once_per_crossing(self):
+        self.approve(5)
+        self.assertEqual(self.alerts()[0], [])
+        self.approve(3)
+        self.approve(1)
+        messages, push = self.alerts()
+        self.assertEqual(messages, ['Low stock: Toner is down to 2 (reorder level 4).'])
+        push.assert_called_once()
+
+        # Restocking through the edit form re-arms the alert for the next dip.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/manage-inventory/edit/{self.item.pk}/', {'name': 'Toner', 'quantity': 9})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reorder_level, 4)
+        self.assertFalse(self.item.reorder_alerted)
+        with self.captureOnCommitCallbacks(execute=True):
+            services.bulk_approve([RequestItem.objects.create(requester=self.admin, item=self.item, quantity=7).pk])
+        self.assertEqual(len(self.alerts()[0]), 2)
+
+    def test_low_stock_query_uses_partial_index(self):
+        InventoryItem.objects.create(name='Paper', quantity=2)
+        sql, params = reorder.below_reorder_level().order_by('name').values_list('name').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('item_low_stock_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        response = self.client.get('/admin_dashboard/')
+        self.assertEqual([item.name for item in response.context['low_stock_items']], ['Paper'])
+        self.assertContains(response, 'Below Reorder Level')
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pass')
+        now = timezone.now()
+        for n, (age, is_read) in enumerate([(40, True), (40, False), (200, False), (5, True), (400, True)]):
+            note = Notification.objects.create(user=self.user, message=f'note {n}', is_read=is_read)
+            Notification.objects.filter(pk=note.pk).update(created_at=now - timedelta(days=age))
+
+    @override_settings(NOTIFICATION_RETENTION={'READ_DAYS': 30, 'UNREAD_DAYS': 180, 'ARCHIVE_DAYS': None, 'BATCH_SIZE': 1})
+    def test_prune_archives_by_age_and_read_state(self):
+        self.assertEqual(retention.prune(), {'read': 2, 'unread': 1, 'expired': 0})
+        self.assertEqual(sorted(Notification.objects.values_list('message', flat=True)), ['note 1', 'note 3'])
+        archived = NotificationArchive.objects.order_by('created_at')
+        self.assertEqual([(a.message, a.is_read) for a in archived], [('note 4', True), ('note 2', False), ('note 0', True)])
+
+        self.assertEqual(retention.prune(ARCHIVE_DAYS=365)['expired'], 1)
+        self.assertEqual(NotificationArchive.objects.count(), 2)
+
+    def test_command_can_delete_without_archiving(self):
+        out = io.StringIO()
+        call_command('prune_notifications', read_days=1, unread_days=1, no_archive=True, stdout=out)
+        self.assertIn('Pruned 3 read and 2 unread', out.getvalue())
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_inbox_is_paginated(self):
+        Notification.objects.bulk_create(Notification(user=self.user, message=f'extra {n}') for n in range(60))
+        self.client.force_login(self.user)
+        first = self.client.get('/notifications/').context['notifications']
+        self.assertEqual(len(first), 50)
+        rest = self.client.get(first.next_url).context['notifications']
+        self.assertEqual(len(rest), 15)
+        self.assertFalse(rest.has_next)
+        self.assertFalse({n.pk for n in first} & {n.pk for n in rest})
+
+
+class UnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username='boss', password='pass', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def test_count_is_cached_and_follows_writes(self):
+        Notification.objects.create(user=self.admin, message='old')
+        self.assertEqual(unread.count(self.admin.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatcher = fanout.Dispatcher(background=False)
+            dispatcher.submit('a')
+            dispatcher.submit('b')
+            dispatcher.flush()
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.count(self.admin.pk), 3)
+
+        note = Notification.objects.filter(user=self.admin).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f'/notifications/acknowledge/{note.pk}/')
+        self.assertEqual(unread.count(self.admin.pk), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/notifications/', [{'id': note.pk, 'is_read': False}],
+                              content_type='application/json')
+        self.assertEqual(unread.count(self.admin.pk), 3)
+
+        response = self.client.get('/admin_dashboard/')
+        self.assertContains(response, '<span class="badge bg-danger">3</span>', html=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/notifications/mark-all/')
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.count(self.admin.pk), 0)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_inbox_marks_read_even_when_the_cached_count_is_stale(self):
+        self.assertEqual(unread.count(self.admin.pk), 0)
+        # Written by another worker whose adjustment has not landed here.
+        Notification.objects.create(user=self.admin, message='late')
+        self.client.get('/notifications/')
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+
+    def test_feed_returns_what_arrived_since_the_cursor(self):
+        Notification.objects.create(user=self.admin, message='before')
+        body = self.client.get('/api/notifications/feed/').json()
+        self.assertEqual((body['results'], body['unread']), ([], 1))
+
+        other = CustomUser.objects.create_user(username='clerk', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=other, message='not mine')
+            for n in range(3):
+                Notification.objects.create(user=self.admin, message=f'new {n}')
+        feed = '/api/notifications/feed/'
+        page = self.client.get(feed, {'since': body['cursor'], 'limit': 2, 'fields': 'message'}).json()
+        self.assertEqual(page['results'], [{'message': 'new 0'}, {'message': 'new 1'}])
+        self.assertTrue(page['more'])
+        page = self.client.get(feed, {'since': page['cursor']}).json()
+        self.assertEqual([row['message'] for row in page['results']], ['new 2'])
+        self.assertEqual((page['more'], page['unread']), (False, 4))
+        self.assertEqual(self.client.get(feed, {'since': page['cursor']}).json()['results'], [])
+        self.assertEqual(self.client.get(feed, {'since': 'x'}).status_code, 400)
+
+        sql, params = Notification.objects.filter(user=self.admin, pk__gt=1).order_by('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
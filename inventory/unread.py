@@ -0,0 +1,93 @@
+# inventory/unread.py
+"""
+Per-user unread notification counts, kept in the cache.
+
+``count`` is one cache read; on a miss it counts from the
+``notif_user_read_idx`` index and caches the result. Writers keep the cached
+value current with ``adjust`` once their transaction commits: model saves
+through the signals below, and bulk inserts, queryset updates and deletes
+by calling it themselves, with the number of rows they changed. (There is
+deliberately no delete signal: one would stop Django deleting notifications
+in bulk.)
+
+Adjustments are increments in the shared cache file, atomic across worker
+processes. Adjusting a count that is not cached does nothing; the next read
+counts afresh. Entries expire on the cache's default timeout, which bounds
+the drift a recount racing a concurrent adjust can leave behind. Because
+of that, use the count for display only, never to decide whether to write.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def _unread(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False)
+
+
+def count(user_id):
+    """How many unread notifications ``user_id`` has."""
+    value = cache.get(_key(user_id))
+    if value is None:
+        value = _unread(user_id).count()
+        cache.add(_key(user_id), value)
+    return value
+
+
+async def acount(user_id):
+    """Async version of ``count``."""
+    value = await cache.aget(_key(user_id))
+    if value is None:
+        value = await _unread(user_id).acount()
+        await cache.aadd(_key(user_id), value)
+    return value
+
+
+def _apply(deltas):
+    for user_id, delta in deltas.items():
+        if delta:
+            try:
+                cache.incr(_key(user_id), delta)
+            except ValueError:
+                pass
+
+
+def adjust(deltas):
+    """Add ``{user_id: delta}`` to the cached counts once the current transaction commits."""
+    deltas = dict(deltas)
+    transaction.on_commit(lambda: _apply(deltas))
+
+
+async def aadjust(deltas):
+    """Async version of ``adjust``, for autocommit writes made on the event loop."""
+    for user_id, delta in dict(deltas).items():
+        if delta:
+            try:
+                await cache.aincr(_key(user_id), delta)
+            except ValueError:
+                pass
+
+
+def forget(user_ids):
+    """Drop the cached counts for ``user_ids``, e.g. after writes whose effect is not known."""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def _remember_read(sender, instance, **kwargs):
+    instance._loaded_unread = instance.__dict__.get('is_read') is False if instance.pk else False
+
+
+def _notification_saved(sender, instance, created, **kwargs):
+    adjust({instance.user_id: (not instance.is_read) - instance._loaded_unread})
+    instance._loaded_unread = not instance.is_read
+
+
+def connect_signals():
+    post_init.connect(_remember_read, sender=Notification)
+    post_save.connect(_notification_saved, sender=Notification)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Auth & Redirect
@@ -14,6 +14,7 @@ urlpatterns = [
     # Inventory Management
     path('manage_inventory/', views.manage_inventory, name='manage_inventory'),
     path('add-item/', views.add_item, name='add_item'),
+    path('manage-inventory/import/', views.import_inventory, name='import_inventory'),
     path('manage-inventory/edit/<int:item_id>/', views.edit_item, name='edit_item'),
     path('manage-inventory/delete/<int:item_id>/', views.delete_item, name='delete_item'),
 
@@ -22,7 +23,9 @@ urlpatterns = [
     path('request-item/', views.request_item, name='request_item'),
     path('requests/approve/<int:request_id>/', views.approve_request, name='approve_request'),
     path('requests/reject/<int:request_id>/', views.reject_request, name='reject_request'),
+    path('requests/bulk/', views.bulk_process_requests, name='bulk_process_requests'),
     path('request-report/<int:request_id>/', views.print_request_report, name='print_request_report'),
+    path('qr/<str:key>.png', views.qr_code, name='qr_code'),
 
     # Users
     path('manage-users/', views.manage_users, name='manage_users'),
@@ -34,9 +37,20 @@ urlpatterns = [
     # Reports
     path('generate-report/', views.generate_reports, name='generate_report'),
     path('item-report/pdf/<int:item_id>/', views.export_item_report_pdf, name='export_item_report_pdf'),
+    path('item-report/pdf/batch/', views.export_items_report_zip, name='export_items_report_zip'),
+    path('item-report/pdf/jobs/<str:job_id>/', views.pdf_job_status, name='pdf_job_status'),
 
     # Notifications
     path('notifications/', views.notifications, name='notifications'),
     path('notifications/mark-all/', views.mark_all_as_read, name='mark_all_as_read'),
     path('notifications/acknowledge/<int:notif_id>/', views.acknowledge_notification, name='acknowledge_notification'),
+
+    # JSON API
+    path('api/items/', api.items, name='api_items'),
+    path('api/requests/', api.requests, name='api_requests'),
+    path('api/notifications/', api.notifications, name='api_notifications'),
+    path('api/notifications/feed/', api.notification_feed, name='api_notification_feed'),
+
+    # Monitoring
+    path('metrics', views.metrics_endpoint, name='metrics'),
 ]
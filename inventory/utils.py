@@ -1,16 +1,31 @@
-# inventory/utils.py
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+
+def _notification_event(title, body):
+    return {
+        "type": "send_notification",
+        "message": {
+            "title": title,
+            "body": body,
+        }
+    }
+
+
 def send_real_time_notification(user, title, body):
     channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"user_{user.id}",
-        {
-            "type": "send_notification",
-            "message": {
-                "title": title,
-                "body": body,
-            }
-        }
-    )
+    async_to_sync(channel_layer.group_send)(f"user_{user.id}", _notification_event(title, body))
+
+
+def send_real_time_notifications(notifications):
+    """Push each ``(user, title, body)``, in one batch where the channel layer supports it."""
+    channel_layer = get_channel_layer()
+    sends = [(f"user_{user.id}", _notification_event(title, body)) for user, title, body in notifications]
+    if hasattr(channel_layer, 'group_send_many'):
+        async_to_sync(channel_layer.group_send_many)(sends)
+        return
+
+    async def send_all():
+        for group, event in sends:
+            await channel_layer.group_send(group, event)
+    async_to_sync(send_all)()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout as logout
@@ -5,19 +6,26 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import get_user_model, update_session_auth_hash
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseForbidden
-from django.template.loader import get_template
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden,
+    HttpResponseNotModified, JsonResponse,
+)
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils.timezone import make_aware
 from datetime import datetime
-from xhtml2pdf import pisa
-import qrcode
+from collections import Counter
+import asyncio
 import io
-import base64
+
+from asgiref.sync import sync_to_async
 
 from .models import InventoryItem, RequestItem, Notification, CustomUser
 from .forms import (
     InventoryItemForm,
+    InventoryImportForm,
     RequestItemForm,
     CustomUserCreationForm,
     CustomUserChangeForm,
@@ -25,6 +33,10 @@ from .forms import (
     EditUserForm
 )
 from inventory.utils import send_real_time_notification
+from inventory import counters, exports, fanout, fragments, importer, ledger, metrics, pdf, qr, reorder, services, unread
+from inventory.conditional import conditional, csrf_tag, viewer_tag
+from inventory.pagination import KeysetPage, akeyset_paginate, decode_cursor, keyset_paginate
+from inventory.routers import read_only
 
 User = get_user_model()
 
@@ -49,22 +61,43 @@ def dashboard_redirect(request):
         return redirect('user_dashboard')
     return redirect('login')
 
+async def _resolve_user(request):
+    # Templates read ``user``; the lazy sync lookup is not allowed on the
+    # event loop, so load it once here.
+    request.user = await request.auser()
+    return request.user
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
 @login_required
-def admin_dashboard(request):
+@read_only
+async def admin_dashboard(request):
+    user = await _resolve_user(request)
+    counts, unread_count, low_stock = await asyncio.gather(
+        counters.aget_counts(),
+        unread.acount(user.id),
+        # One extra row says whether there are more than we show.
+        _alist(reorder.below_reorder_level().order_by('name')[:reorder.DASHBOARD_LIMIT + 1]),
+    )
     context = {
-        'total_items': InventoryItem.objects.count(),
-        'total_requests': RequestItem.objects.count(),
-        'pending_requests': RequestItem.objects.filter(status='pending').count(),
-        'total_users': User.objects.count(),
-        'notifications': Notification.objects.filter(user=request.user, is_read=False),
+        **counts, 'unread_count': unread_count,
+        'low_stock_items': low_stock[:reorder.DASHBOARD_LIMIT],
+        'more_low_stock': len(low_stock) > reorder.DASHBOARD_LIMIT,
     }
     return render(request, 'admin_dashboard.html', context)
 
 @login_required
-def user_dashboard(request):
+@read_only
+async def user_dashboard(request):
+    user = await _resolve_user(request)
+    requests, unread_count = await asyncio.gather(
+        _alist(RequestItem.objects.filter(requester=user).select_related('item').order_by('-created_at')),
+        unread.acount(user.id),
+    )
     context = {
-        'requests': RequestItem.objects.filter(requester=request.user).order_by('-created_at'),
-        'notifications': Notification.objects.filter(user=request.user, is_read=False),
+        'requests': requests,
+        'unread_count': unread_count,
     }
     return render(request, 'user_dashboard.html', context)
 
@@ -73,38 +106,91 @@ def logout_view(request):
     logout(request)
     return redirect('login')
 
+async def _inventory_validators(request, *args, **kwargs):
+    # Every item change replaces the generation, so it versions both tables.
+    # The inventory page's delete form carries a CSRF token.
+    generation = await fragments.ageneration()
+    return f'{generation:x}-{viewer_tag(await request.auser())}-{csrf_tag(request)}', None
+
 @login_required
-def manage_inventory(request):
-    items = InventoryItem.objects.all().order_by('-created_at')
-    return render(request, 'manage_inventory.html', {'items': items})
+@conditional(_inventory_validators)
+async def manage_inventory(request):
+    await _resolve_user(request)
+    # Keyed on the decoded position, not the raw text: every malformed
+    # cursor is the first page, and shares its entry.
+    position = decode_cursor(request.GET.get('cursor', ''))
+    key = fragments.make_key('inventory_table', await fragments.ageneration(), position)
+
+    async def render_rows():
+        items = await akeyset_paginate(request, InventoryItem.objects.all())
+        return render_to_string('inventory_rows.html', {'items': items}), items.next_cursor
+
+    rows, next_cursor = await fragments.aget_or_render(key, render_rows)
+    return render(request, 'manage_inventory.html', {'rows': rows, 'page': KeysetPage([], next_cursor, request)})
 
 @login_required
 def manage_requests(request):
-    return render(request, 'manage_requests.html', {'requests': RequestItem.objects.all()})
+    requests = keyset_paginate(request, RequestItem.objects.select_related('requester', 'item'))
+    return render(request, 'manage_requests.html', {'requests': requests})
 
 @login_required
 def manage_users(request):
-    return render(request, 'manage_users.html', {'users': User.objects.all()})
+    users = keyset_paginate(request, User.objects.all(), field='date_joined')
+    return render(request, 'manage_users.html', {'users': users})
 
 @login_required
 def add_item(request):
     if request.method == 'POST':
         form = InventoryItemForm(request.POST)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                item = form.save()
+                ledger.record(item.pk, item.quantity, 'initial')
             messages.success(request, "Item added successfully!")
             return redirect('manage_inventory')
     else:
         form = InventoryItemForm()
     return render(request, 'add_item.html', {'form': form})
 
+@login_required
+def import_inventory(request):
+    result = None
+    if request.method == 'POST':
+        form = InventoryImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            result = importer.import_csv(lines)
+            if result.incomplete:
+                line, reason = result.errors[-1]
+                messages.error(
+                    request,
+                    f"The file could not be read from line {line} on: {reason}. Rows before it were imported: "
+                    f"{result.created} created, {result.updated} updated. Save it as UTF-8 CSV and import it again.",
+                )
+            else:
+                messages.success(request, f"Import finished: {result.created} created, {result.updated} updated.")
+            skipped = len(result.errors) - result.incomplete
+            if skipped:
+                messages.warning(request, f"{skipped} row(s) were skipped.")
+    else:
+        form = InventoryImportForm()
+    return render(request, 'import_inventory.html', {'form': form, 'result': result})
+
 @login_required
 def edit_item(request, item_id):
     item = get_object_or_404(InventoryItem, id=item_id)
     if request.method == 'POST':
         form = InventoryItemForm(request.POST, instance=item)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                # Read the stock inside the write transaction: an approval
+                # committed since ``item`` was loaded is then part of it, and
+                # the ledger keeps summing to the stored quantity.
+                previous_quantity = get_object_or_404(
+                    InventoryItem.objects.select_for_update().values_list('quantity', flat=True), pk=item.pk,
+                )
+                item = form.save()
+                ledger.record(item.pk, item.quantity - previous_quantity, 'adjustment')
             messages.success(request, 'Item updated successfully.')
             return redirect('manage_inventory')
     else:
@@ -129,8 +215,7 @@ def request_item(request):
             inventory_request = form.save(commit=False)
             inventory_request.requester = request.user
             inventory_request.save()
-            for admin in User.objects.filter(is_staff=True):
-                Notification.objects.create(user=admin, message=f"{request.user.username} requested {inventory_request.item.name}")
+            fanout.notify_admins(f"{request.user.username} requested {inventory_request.item.name}")
             return redirect('user_dashboard')
     else:
         form = RequestItemForm()
@@ -138,18 +223,13 @@ def request_item(request):
 
 @login_required
 def approve_request(request, request_id):
-    req = get_object_or_404(RequestItem, pk=request_id)
-
-    if req.status != 'approved':
-        item = req.item
-        if item.quantity >= req.quantity:
-            item.quantity -= req.quantity
-            item.save()
-            req.status = 'approved'
-            req.save()
-            messages.success(request, f"{req.quantity} unit(s) of {item.name} deducted.")
-        else:
-            messages.error(request, f"Not enough stock for {item.name}.")
+    req = get_object_or_404(RequestItem.objects.select_related('item'), pk=request_id)
+
+    outcome = services.approve_request(req)
+    if outcome == services.APPROVED:
+        messages.success(request, f"{req.quantity} unit(s) of {req.item.name} deducted.")
+    elif outcome == services.INSUFFICIENT_STOCK:
+        messages.error(request, f"Not enough stock for {req.item.name}.")
     else:
         messages.warning(request, "This request is already approved.")
 
@@ -163,6 +243,49 @@ def reject_request(request, request_id):
     inventory_request.save()
     return redirect('manage_requests')
 
+@login_required
+def bulk_process_requests(request):
+    if request.method != 'POST':
+        return redirect('manage_requests')
+
+    action = request.POST.get('action')
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if request.POST.get('select_all_pending'):
+        pending = RequestItem.objects.filter(status='pending')
+        for name in ('item', 'requester'):
+            value = request.POST.get(name)
+            if not value:
+                continue
+            if not value.isdigit():
+                error = f"Invalid {name} filter."
+                if wants_json:
+                    return JsonResponse({'error': error}, status=400)
+                messages.error(request, error)
+                return redirect('manage_requests')
+            pending = pending.filter(**{f'{name}_id': int(value)})
+        request_ids = pending.order_by('created_at', 'id').values_list('id', flat=True)
+    else:
+        request_ids = [int(pk) for pk in request.POST.getlist('request_ids') if pk.isdigit()]
+
+    if action == 'approve':
+        outcomes = services.bulk_approve(request_ids)
+    elif action == 'reject':
+        outcomes = services.bulk_reject(request_ids)
+    else:
+        return HttpResponseBadRequest('Unknown action.')
+
+    summary = Counter(outcomes.values())
+    if wants_json:
+        return JsonResponse({'summary': summary, 'outcomes': outcomes})
+
+    if summary[services.APPROVED] or summary[services.REJECTED]:
+        messages.success(request, f"{summary[services.APPROVED] + summary[services.REJECTED]} request(s) {action}d.")
+    if summary[services.INSUFFICIENT_STOCK]:
+        messages.error(request, f"{summary[services.INSUFFICIENT_STOCK]} request(s) skipped: not enough stock.")
+    if summary[services.NOT_PENDING]:
+        messages.warning(request, f"{summary[services.NOT_PENDING]} request(s) skipped: no longer pending.")
+    return redirect('manage_requests')
+
 @login_required
 def add_user(request):
     if request.method == 'POST':
@@ -230,63 +353,136 @@ def change_user_password(request, user_id):
     return render(request, 'change_user_password.html', {'form': form, 'user_obj': user})
 
 @login_required
-def notifications(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-    notes = Notification.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'notifications.html', {'notifications': notes})
+async def notifications(request):
+    user = await _resolve_user(request)
+    # The cached count may lag behind other workers, so always ask the table;
+    # with nothing unread this is one index probe.
+    marked = await Notification.objects.filter(user=user, is_read=False).aupdate(is_read=True)
+    await unread.aadjust({user.id: -marked})
+    page = await akeyset_paginate(request, Notification.objects.filter(user=user))
+    return render(request, 'notifications.html', {'notifications': page, 'page': page})
 
 @login_required
 def mark_all_as_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    marked = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    unread.adjust({request.user.id: -marked})
     return redirect('notifications')
 
 @login_required
 def acknowledge_notification(request, notif_id):
     notif = get_object_or_404(Notification, id=notif_id, user=request.user)
     notif.is_read = True
-    notif.save()
+    notif.save()  # the unread count follows through the post_save signal
     return redirect('notifications')
 
+# Rows the report page shows, which bounds the size of each cached table;
+# the exports carry the whole report
+REPORT_LIMIT = 200
+
 @login_required
-def generate_reports(request):
+@read_only
+@conditional(_inventory_validators)
+async def generate_reports(request):
+    await _resolve_user(request)
     form = InventoryReportSearchForm(request.GET or None)
-    items = InventoryItem.objects.all()
-    if form.is_valid():
-        search = form.cleaned_data.get('search')
-        start_date = form.cleaned_data.get('start_date')
-        end_date = form.cleaned_data.get('end_date')
-        if search:
-            items = items.filter(name__icontains=search)
-        if start_date:
-            items = items.filter(created_at__date__gte=start_date)
-        if end_date:
-            items = items.filter(created_at__date__lte=end_date)
-    return render(request, 'generate_report.html', {'form': form, 'items': items})
-
-def generate_qr_code(data):
-    qr = qrcode.make(data)
-    buffer = io.BytesIO()
-    qr.save(buffer, format="PNG")
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    return f'data:image/png;base64,{img_str}'
+    items = form.filter_items(InventoryItem.objects.all())
+    export = request.GET.get('export')
+    if export == 'csv':
+        return exports.csv_response(request, items, 'inventory_report.csv')
+    if export == 'xlsx':
+        return await sync_to_async(exports.xlsx_response)(items, 'inventory_report.xlsx')
+    key = fragments.make_key('report_rows', await fragments.ageneration(), form.normalized_filters())
+
+    async def render_rows():
+        # One extra row says whether the report was cut short.
+        items_shown = await _alist(items[:REPORT_LIMIT + 1])
+        rows = render_to_string('report_rows.html', {'items': items_shown[:REPORT_LIMIT]})
+        return rows, len(items_shown) > REPORT_LIMIT
+
+    rows, truncated = await fragments.aget_or_render(key, render_rows)
+    return render(request, 'generate_report.html', {
+        'form': form, 'rows': rows, 'truncated': truncated, 'report_limit': REPORT_LIMIT,
+        'xlsx_available': exports.XLSX_AVAILABLE,
+    })
+
+def _print_validators(request, request_id):
+    stamps = RequestItem.objects.filter(id=request_id).values_list('updated_at', 'item__updated_at').first()
+    if stamps is None:
+        return None, None
+    request_stamp, item_stamp = stamps
+    etag = f'{request_stamp.timestamp()}-{item_stamp.timestamp()}-{viewer_tag(request.user)}'
+    return etag, max(request_stamp, item_stamp)
 
 @login_required
+@read_only
+@conditional(_print_validators)
 def print_request_report(request, request_id):
     request_obj = get_object_or_404(RequestItem, id=request_id)
     item = request_obj.item
     qr_data = f"Item: {item.name}, Location: {item.location}, Status: {request_obj.status}"
-    qr_code_url = generate_qr_code(qr_data)
+    qr_code_url = reverse('qr_code', args=[qr.register(qr_data)])
     return render(request, 'print_item_report.html', {'item': item, 'request_obj': request_obj, 'qr_code_url': qr_code_url})
 
+@login_required
+def qr_code(request, key):
+    if not qr.is_valid_key(key):
+        raise Http404
+    etag = f'"{key}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        png = qr.load(key)
+        if png is None:
+            raise Http404
+        response = HttpResponse(png, content_type='image/png')
+    # The URL is derived from the image content, so it can be cached forever.
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response['ETag'] = etag
+    return response
+
+def _pdf_file_response(job_id):
+    return FileResponse(open(pdf.pdf_path(job_id), 'rb'), as_attachment=True, filename='item_report.pdf')
+
 @login_required
 def export_item_report_pdf(request, item_id):
     item = get_object_or_404(InventoryItem, id=item_id)
-    item_request = RequestItem.objects.filter(item=item).first()
-    context = {'item': item, 'request_obj': item_request}
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="item_report.pdf"'
-    html = get_template('print_item_report.html').render(context)
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    if pisa_status.err:
-        return HttpResponse('Error generating PDF', status=500)
+    item_request = RequestItem.objects.filter(item=item).select_related('requester').first()
+    job_id = pdf.submit(pdf.item_report_html(item, item_request))
+    if pdf.status(job_id) == pdf.DONE:
+        return _pdf_file_response(job_id)
+    return redirect('pdf_job_status', job_id=job_id)
+
+@login_required
+def export_items_report_zip(request):
+    items = InventoryReportSearchForm(request.GET or None).filter_items(InventoryItem.objects.all())
+    if request.GET.get('category'):
+        items = items.filter(category=request.GET['category'])
+    if request.GET.get('location'):
+        items = items.filter(location=request.GET['location'])
+    response = exports.streaming_response(
+        request, pdf.iter_zip(pdf.iter_item_reports(items)), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="item_reports.zip"'
     return response
+
+@login_required
+def pdf_job_status(request, job_id):
+    if not pdf.is_valid_job_id(job_id):
+        raise Http404
+    state = pdf.status(job_id)
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'job': job_id, 'status': state}, status=404 if state == pdf.UNKNOWN else 200)
+    if state == pdf.DONE:
+        return _pdf_file_response(job_id)
+    if state == pdf.PENDING:
+        response = HttpResponse('Your PDF is being generated. This page will refresh automatically.', status=202)
+        response['Refresh'] = '2'
+        return response
+    if state == pdf.FAILED:
+        return HttpResponse('Error generating PDF', status=500)
+    raise Http404
+
+def metrics_endpoint(request):
+    # Scraped by Prometheus rather than browsed, so gated by address, not login.
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1')):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'inventory.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,7 +61,7 @@ ROOT_URLCONF = 'inventory_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'inventory.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,13 +80,42 @@ WSGI_APPLICATION = 'inventory_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# WAL lets readers run alongside the writer; IMMEDIATE transactions take the
+# write lock up front and wait on it for ``timeout`` seconds, rather than
+# failing with "database is locked" when a read lock cannot be upgraded.
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Same file, opened read-only; reports and dashboards read from here
+    # (see inventory/routers.py). Point it at a real replica elsewhere.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'OPTIONS': {'init_command': 'PRAGMA query_only=ON;', 'timeout': 20},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['inventory.routers.ReadReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,17 +166,49 @@ LOGIN_REDIRECT_URL = '/redirect/'  # Role-based redirection view
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 
+# Runs the tests against scratch copies of the shared cache and channel files
+TEST_RUNNER = 'inventory.testing.TestRunner'
+
+# Local LRU per process in front of a SQLite file every worker shares, so
+# sessions and cached counters survive across processes (see inventory/cache.py).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'inventory.cache.TwoTierCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,
+            'SYNC_INTERVAL': 0.5,
+            # Sessions live here too, and the soonest to expire are culled
+            # first, so leave plenty of room above the active session count.
+            'MAX_ENTRIES': 50000,
+        },
     }
 }
 
+# Metrics: who may scrape /metrics, and the duration (seconds) above which a
+# request is logged with its SQL to ``inventory.slow_requests`` (None = off)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+SLOW_REQUEST_THRESHOLD = None
+
+# How long notifications stay in the inbox (days; None = forever). Run
+# ``manage.py prune_notifications`` periodically; see inventory/retention.py.
+NOTIFICATION_RETENTION = {
+    'READ_DAYS': 30,
+    'UNREAD_DAYS': 180,
+    'ARCHIVE': True,
+    'ARCHIVE_DAYS': 365,
+}
+
 ASGI_APPLICATION = 'inventory_system.asgi.application'
 
+# Shared by every web and Daphne process on the host through a SQLite file,
+# so notifications reach sockets held by other workers (see inventory/layers.py).
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+        "BACKEND": "inventory.layers.SQLiteChannelLayer",
+        "CONFIG": {
+            "path": os.path.join(BASE_DIR, 'channels.sqlite3'),
+        },
     },
 }
 